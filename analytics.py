@@ -3,156 +3,569 @@
 # This module contains all logic for the Analytic mode.
 
 
-from collections import deque, Counter
 import numpy as np
-import matplotlib.pyplot as plt
-import os
-from minesweeper_game import Minesweeper 
+import time
+import analytics_cache
+import cProfile
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from board_metrics import bbbv, opening_sizes
+from clusters import cluster_stats_batch, count_clusters, label_components
+from instrumentation import StageTimer
+from minesweeper_game import board_values, count_neighbours, generate_boards
+from plots import output_path, render
+from solver import win_rate
+
+# Boards per batch. Each batch gets its own random stream, so it is the unit of
+# seeding (board_at, the cache and board archives rely on it) and of parallel work.
+BATCH_SIZE = 10_000
+# Cells generated and analysed at once: a batch of large boards is processed in
+# sub-chunks of CELL_BUDGET // (rows*cols) boards, drawn one after the other
+# from the batch's stream, so peak memory does not grow with the board size.
+CELL_BUDGET = 4_000_000
+# Minimum seconds between two progress lines
+PROGRESS_INTERVAL = 1.0
+# Where the first click of every board goes, and whether mines avoid it:
+#   none   - unprotected click at the center (mines anywhere, the click can lose)
+#   center - safe-first-click zone at the center
+#   random - safe-first-click zone around a random cell per board
+#   corner - safe-first-click zone at the top-left corner
+FIRST_CLICK_POLICIES = ("none", "center", "random", "corner")
 
 def count_mine_clusters(mines_set, rows, cols):
     """
-    Counts 8-connected clusters of mines using a BFS.
+    Counts 8-connected clusters of mines.
     'mines_set' is a set of (r, c) tuples.
     """
-    visited = set()
-    clusters = 0
-    
-    for mine_cell in mines_set:
-        if mine_cell in visited:
-            # This mine is already part of a cluster we've counted
-            continue
-            
-        # Found the start of a new cluster
-        clusters += 1
-        
-        # Use BFS to find all connected mines in this cluster
-        queue = deque([mine_cell])
-        visited.add(mine_cell)
-        
-        while queue:
-       
-            current_r, current_c = queue.popleft()
-            
-            # Check all 8 neighbors
-            for dr in (-1, 0, 1):
-                for dc in (-1, 0, 1):
-                    if dr == 0 and dc == 0:
-                        continue
-                    
-                    
-                    neighbor_r, neighbor_c = current_r + dr, current_c + dc
-                    neighbor_cell = (neighbor_r, neighbor_c)
-                    
-                    if neighbor_cell in mines_set and neighbor_cell not in visited:
-                        # This neighbor is a mine and haven't been noticed yet
-                        visited.add(neighbor_cell)
-                        queue.append(neighbor_cell)
-    return clusters
-
-
-def analytics_mode(rows, cols, nBombs, num_boards=1000):
-    SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+    mine_mask = np.zeros((rows, cols), dtype=bool)
+    for r, c in mines_set:
+        mine_mask[r, c] = True
+    return count_clusters(mine_mask)
+
+
+class RunningStats:
+    """
+    Online mean/variance (Welford) of a per-board statistic, fed one batch at a time.
+    Each batch is folded in with Chan's parallel update, so partial stats
+    coming back from worker processes merge the same way.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0 # Sum of squared deviations from the mean
+
+    def update(self, values):
+        """Fold a batch of per-board values into the running stats."""
+        values = np.asarray(values, dtype=float)
+        batch = RunningStats()
+        batch.count = values.size
+        if batch.count:
+            batch.mean = float(values.mean())
+            batch.m2 = float(((values - batch.mean) ** 2).sum())
+        self.merge(batch)
+
+    def merge(self, other):
+        """Combine another RunningStats into this one."""
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+
+    def as_array(self):
+        return np.array([self.count, self.mean, self.m2])
+
+    @classmethod
+    def from_array(cls, array):
+        stats = cls()
+        stats.count, stats.mean, stats.m2 = int(array[0]), float(array[1]), float(array[2])
+        return stats
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+
+def batch_seeds(seed, num_batches):
+    """
+    One independent SeedSequence per batch of BATCH_SIZE boards.
+    Batch i always gets the same stream for a given master seed, whichever
+    process ends up generating it and however many boards the run has.
+    """
+    return np.random.SeedSequence(seed).spawn(num_batches)
+
+
+def chunk_boards(rows, cols):
+    """Boards per sub-chunk of a batch (see CELL_BUDGET)."""
+    return max(1, CELL_BUDGET // (rows * cols))
+
+
+def sub_chunks(rows, cols, num_boards, skip=0):
+    """
+    (start, stop) ranges splitting the 'num_boards' boards after the first
+    'skip' of a batch into sub-chunks of at most chunk_boards(rows, cols)
+    boards. The cuts fall on the same boards of the batch whatever 'skip' is.
+    """
+    size = chunk_boards(rows, cols)
+    start = 0
+    while start < num_boards:
+        stop = min(num_boards, ((skip + start) // size + 1) * size - skip)
+        yield start, stop
+        start = stop
+
+
+def first_clicks(rows, cols, num_boards, policy, seed_seq=None, skip=0):
+    """
+    The first click of every board of a batch under 'policy' (see
+    FIRST_CLICK_POLICIES), as an int array (num_boards, 2).
+    Random clicks come from their own stream, the first child of the batch's
+    SeedSequence, so the mine layouts do not depend on the policy's draws;
+    'skip' jumps over the clicks of the first boards, as in analyse_batch.
+    """
+    if policy not in FIRST_CLICK_POLICIES:
+        raise ValueError(f"Unknown first-click policy: {policy}")
+    if policy == "random":
+        rng = np.random.default_rng(np.random.SeedSequence(seed_seq.entropy, spawn_key=seed_seq.spawn_key + (0,)))
+        if skip:
+            rng.bit_generator.advance(skip) # One 64-bit value per click
+        cells = (rng.random(num_boards) * (rows * cols)).astype(np.int64)
+        return np.stack(np.divmod(cells, cols), axis=1)
+    cell = (0, 0) if policy == "corner" else (rows // 2, cols // 2)
+    return np.tile(np.array(cell, dtype=np.int64), (num_boards, 1))
+
+
+def policy_safe(policy, clicks):
+    """The 'safe' argument of generate_boards for a batch's first clicks."""
+    if policy == "none":
+        return None
+    if policy == "random":
+        return clicks
+    return tuple(clicks[0]) # The same cell on every board: the faster shared zone
+
+
+def board_at(rows, cols, nBombs, seed, board_id, policy="none"):
+    """
+    Board number 'board_id' of the analytics run for 'seed' and 'policy', as
+    (mines, values) for a single (rows, cols) board, without generating the
+    boards before it: the batch's SeedSequence is built directly from its
+    spawn key, and the stream is advanced past the earlier boards of the batch.
+    """
+    batch, offset = divmod(board_id, BATCH_SIZE)
+    # Same as batch_seeds(seed, n)[batch] for any n > batch
+    seed_seq = np.random.SeedSequence(seed, spawn_key=(batch,))
+    clicks = first_clicks(rows, cols, 1, policy, seed_seq, skip=offset)
+    rng = np.random.default_rng(seed_seq)
+    rng.bit_generator.advance(offset * rows * cols)
+    mines, values = generate_boards(rows, cols, nBombs, 1, safe=policy_safe(policy, clicks), rng=rng)
+    return mines[0], values[0]
+
+
+def analyse_batch(rows, cols, nBombs, num_boards, seed_seq, skip=0, profile=False, policy="none"):
+    """
+    Generates one batch of boards under the first-click 'policy' and returns
+    its partial accumulators.
+    'skip' jumps over the first boards of the batch's random stream, so a
+    batch can be finished off after a run that stopped part-way through it.
+    Runs in a worker process when analytics_mode is given workers > 1.
+    With 'profile' the accumulators also carry the batch's StageTimer under
+    "timings" (collect takes it out before merging).
+    """
+    timer = StageTimer(enabled=profile)
+    clicks = first_clicks(rows, cols, num_boards, policy, seed_seq, skip)
+    rng = np.random.default_rng(seed_seq)
+    if skip:
+        # generate_boards draws one 64-bit value per cell and board
+        rng.bit_generator.advance(skip * rows * cols)
+    part = empty_accumulators(rows, cols, nBombs)
+    # Sub-chunks draw from the same stream in order, so the boards do not depend on the cell budget
+    for start, stop in sub_chunks(rows, cols, num_boards, skip):
+        with timer.stage("generation", items=stop - start):
+            # With policy "none", 'safe=None' for an unbiased random distribution
+            mines, _ = generate_boards(rows, cols, nBombs, stop - start,
+                                       safe=policy_safe(policy, clicks[start:stop]), rng=rng)
+        merge_accumulators(part, analyse_mines(rows, cols, nBombs, mines, timer, clicks[start:stop]))
+    if profile:
+        part["timings"] = timer
+    return part
+
+
+def analyse_mines(rows, cols, nBombs, mines, timer=None, clicks=None):
+    """
+    Partial accumulators for a (num_boards, rows, cols) batch of mine masks,
+    however they were generated. 'clicks' (num_boards, 2) are the first
+    clicks for the opening sizes; by default an unprotected click at the
+    center, as with policy "none". Each statistic is timed as a stage of
+    'timer' (a StageTimer), if given.
+    """
+    timer = timer or StageTimer(enabled=False)
+    num_boards = mines.shape[0]
+    with timer.stage("values", items=num_boards):
+        values = board_values(mines)
+
+    # -- 1. White Cells --
+    with timer.stage("empty_cells", items=num_boards):
+        empty_counts = (values == 0).sum(axis=(1, 2))
+        empty_stats = RunningStats()
+        empty_stats.update(empty_counts)
+        # A board has at most rows*cols empty cells, so the histogram size is fixed
+        empty_hist = np.bincount(empty_counts, minlength=rows * cols + 1)
+
+    # -- 2. Number Distribution --
+    with timer.stage("number_distribution", items=num_boards):
+        # Only count 0-8, not -1 (mines)
+        number_counts = np.bincount(values[values >= 0], minlength=9)
+
+    # -- 3. Mine Clusters --
+    with timer.stage("clusters", items=num_boards):
+        cluster_counts, batch_sizes = cluster_stats_batch(mines)
+        cluster_stats = RunningStats()
+        cluster_stats.update(cluster_counts)
+        # ... and at most nBombs clusters
+        cluster_hist = np.bincount(cluster_counts, minlength=nBombs + 1)
+        cluster_sizes = np.zeros(nBombs + 1, dtype=np.int64)
+        cluster_sizes[:len(batch_sizes)] += batch_sizes
+
+    # -- 4. Neighborhood Heatmap --
+    with timer.stage("heatmap", items=num_boards):
+        # The 3x3 sum is linear, so sum the mine masks over the batch first
+        # and run a single 3x3 box sum on the result.
+        neighbourhood_sum = count_neighbours(mines.sum(axis=0), include_self=True)
+
+    # Openings ('0' regions) are labeled once for both 3BV and the opening sizes
+    with timer.stage("zero_regions", items=num_boards):
+        zero_labels = label_components(values == 0)
+
+    # -- 5. 3BV --
+    with timer.stage("3bv", items=num_boards):
+        bbbv_counts = bbbv(values, zero_labels)
+        bbbv_stats = RunningStats()
+        bbbv_stats.update(bbbv_counts)
+        # Every click clears at least one safe cell, so 3BV <= rows*cols
+        bbbv_hist = np.bincount(bbbv_counts, minlength=rows * cols + 1)
+
+    # -- 6. Opening Sizes --
+    with timer.stage("openings", items=num_boards):
+        if clicks is None:
+            clicks = first_clicks(rows, cols, num_boards, "none")
+        sizes = opening_sizes(values, clicks, zero_labels)
+        opening_stats = RunningStats()
+        opening_stats.update(sizes)
+        # 0 = the first click hit a mine
+        opening_hist = np.bincount(sizes, minlength=rows * cols + 1)
+
+    return {
+        "num_boards": num_boards,
+        "empty_hist": empty_hist,
+        "empty_stats": empty_stats,
+        "number_counts": number_counts,
+        "cluster_hist": cluster_hist,
+        "cluster_stats": cluster_stats,
+        "cluster_sizes": cluster_sizes,
+        "neighbourhood_sum": neighbourhood_sum,
+        "bbbv_hist": bbbv_hist,
+        "bbbv_stats": bbbv_stats,
+        "opening_hist": opening_hist,
+        "opening_stats": opening_stats,
+    }
+
+
+def empty_accumulators(rows, cols, nBombs):
+    """Zeroed accumulators for a configuration, in the same layout analyse_batch returns."""
+    return {
+        "num_boards": 0,
+        "empty_hist": np.zeros(rows * cols + 1, dtype=np.int64), # How many boards had 0, 1, 2 ... '0' cells
+        "empty_stats": RunningStats(), # Mean/variance of '0' cells per board
+        "number_counts": np.zeros(9, dtype=np.int64), # Total counts of '0', '1', ... '8'
+        "cluster_hist": np.zeros(nBombs + 1, dtype=np.int64), # How many boards had 0, 1, 2 ... clusters
+        "cluster_stats": RunningStats(), # Mean/variance of clusters per board
+        "cluster_sizes": np.zeros(nBombs + 1, dtype=np.int64), # How many clusters had 1, 2, ... mines
+        # Sum of the 3x3 neighborhood mine counts over all boards
+        "neighbourhood_sum": np.zeros((rows, cols), dtype=np.int64),
+        "bbbv_hist": np.zeros(rows * cols + 1, dtype=np.int64), # How many boards had a 3BV of 0, 1, 2 ...
+        "bbbv_stats": RunningStats(), # Mean/variance of 3BV per board
+        "opening_hist": np.zeros(rows * cols + 1, dtype=np.int64), # How many first clicks revealed 0, 1, 2 ... cells
+        "opening_stats": RunningStats(), # Mean/variance of cells revealed by the first click
+    }
+
+
+def merge_accumulators(total, part):
+    """Adds the partial accumulators 'part' into 'total' (in place)."""
+    for key, value in part.items():
+        if isinstance(value, RunningStats):
+            total[key].merge(value)
+        else:
+            total[key] += value
+
+
+def accumulators_to_arrays(acc):
+    """Plain-array view of the accumulators, e.g. for saving with np.savez."""
+    return {key: value.as_array() if isinstance(value, RunningStats) else np.asarray(value)
+            for key, value in acc.items()}
+
+
+def accumulators_from_arrays(arrays):
+    """Inverse of accumulators_to_arrays."""
+    acc = {}
+    for key, value in arrays.items():
+        if key.endswith("_stats"):
+            acc[key] = RunningStats.from_array(value)
+        elif key == "num_boards":
+            acc[key] = int(value)
+        else:
+            acc[key] = value
+    return acc
+
+
+def run_batches(fn, jobs, workers=1, on_result=None, total=None, executor_class=ProcessPoolExecutor):
+    """
+    Calls fn(*job) for every job (a tuple of arguments), in a pool of
+    'workers' (processes by default) when workers > 1, and hands every
+    result to on_result(job, result) in job order, as the results come in.
+    With 'total', on_result returns how many boards the result covered and
+    a progress line is printed at most every PROGRESS_INTERVAL seconds.
+    Without on_result the results are returned as a list.
+    On an error or Ctrl-C the jobs still queued in the pool are cancelled
+    instead of being run to the end.
+    """
+    results = []
+    if on_result is None:
+        on_result = lambda job, result: results.append(result)
+    if workers > 1 and len(jobs) > 1:
+        executor = executor_class(max_workers=workers)
+        outputs = executor.map(fn, *zip(*jobs))
+    else:
+        executor = None
+        outputs = (fn(*job) for job in jobs)
+
+    done = 0
+    started = last_report = time.perf_counter()
+    try:
+        for job, result in zip(jobs, outputs):
+            done += on_result(job, result) or 0
+            now = time.perf_counter()
+            if total is not None and (now - last_report >= PROGRESS_INTERVAL or done == total):
+                print_progress(done, total, now - started)
+                last_report = now
+    except BaseException:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        raise
+    if executor is not None:
+        executor.shutdown()
+    return results
+
+
+def collect(rows, cols, nBombs, num_boards, seed=None, workers=1, first_board=0, timer=None, policy="none"):
+    """
+    Generates boards first_board .. num_boards-1 of the run for 'seed' and
+    'policy' and returns their merged accumulators. An enabled StageTimer 'timer' gets
+    the stage timings of every batch, plus the time spent merging.
+    """
+    timer = timer or StageTimer(enabled=False)
+    acc = empty_accumulators(rows, cols, nBombs)
+    first_batch = first_board // BATCH_SIZE
+    seeds = batch_seeds(seed, -(-num_boards // BATCH_SIZE)) # ceil division
+
+    # analyse_batch arguments of every batch that still has boards to generate
+    jobs = []
+    for batch in range(first_batch, len(seeds)):
+        start = max(batch * BATCH_SIZE, first_board)
+        end = min((batch + 1) * BATCH_SIZE, num_boards)
+        jobs.append((rows, cols, nBombs, end - start, seeds[batch], start - batch * BATCH_SIZE, timer.enabled, policy))
+
+    def merge(job, part):
+        if timer.enabled:
+            timer.merge(part.pop("timings"))
+        with timer.stage("merge", items=part["num_boards"]):
+            merge_accumulators(acc, part)
+        return part["num_boards"]
+
+    # Merge in batch order, so the floating point stats come out the same too
+    run_batches(analyse_batch, jobs, workers, merge, total=num_boards - first_board)
+    return acc
+
+
+@dataclass
+class AnalyticsResult:
+    """The outcome of an analytics run, independent of how it is shown or saved."""
+    rows: int
+    cols: int
+    nBombs: int
+    num_boards: int
+    seed: object
+    empty_hist: np.ndarray # empty_hist[k]: boards with k '0' cells
+    empty_stats: RunningStats
+    number_counts: np.ndarray # number_counts[v]: cells showing v, over all boards
+    cluster_hist: np.ndarray # cluster_hist[k]: boards with k mine clusters
+    cluster_stats: RunningStats
+    cluster_sizes: np.ndarray # cluster_sizes[s]: clusters of s mines, over all boards
+    neighbourhood_sum: np.ndarray # 3x3 neighbourhood mine counts summed over all boards
+    bbbv_hist: np.ndarray # bbbv_hist[k]: boards with a 3BV of k
+    bbbv_stats: RunningStats
+    opening_hist: np.ndarray # opening_hist[k]: first clicks that revealed k cells (0 = hit a mine)
+    opening_stats: RunningStats
+    policy: str = "none" # First-click policy the boards were generated with
+    solver_games: int = 0 # Games played by the solver for the win rate (0 = not measured)
+    solver_win_rate: float = None
+    timings: dict = None # Stage timing breakdown (see StageTimer.summary), when profiled
+
+    @classmethod
+    def from_accumulators(cls, rows, cols, nBombs, seed, acc, policy="none"):
+        fields = {key: value for key, value in acc.items() if key != "num_boards"}
+        return cls(rows=rows, cols=cols, nBombs=nBombs, num_boards=acc["num_boards"], seed=seed, policy=policy,
+                   **fields)
+
+    def config_name(self):
+        """'16x16x40', plus the first-click policy unless it is "none"; used in file names."""
+        name = f"{self.rows}x{self.cols}x{self.nBombs}"
+        return name if self.policy == "none" else f"{name}_{self.policy}"
+
+    def to_dict(self):
+        """JSON-friendly copy of the result."""
+        data = {}
+        for key, value in vars(self).items():
+            if isinstance(value, RunningStats):
+                value = {"count": value.count, "mean": value.mean, "std": value.std}
+            elif isinstance(value, np.ndarray):
+                value = value.tolist()
+            data[key] = value
+        return data
+
+    def save(self, fmt="npz", output_dir=None):
+        """Saves the result as .npz or .json (into 'output_dir' if given) and returns the file name."""
+        fname = output_path(f"analytics_{self.config_name()}.{fmt}", output_dir)
+        if fmt == "json":
+            with open(fname, "w") as f:
+                json.dump(self.to_dict(), f, indent=2)
+        elif fmt == "npz":
+            arrays = {key: value for key, value in vars(self).items()
+                      if key not in ("seed", "timings") and value is not None}
+            np.savez_compressed(fname, seed=str(self.seed), **accumulators_to_arrays(arrays))
+        else:
+            raise ValueError(f"Unknown result format: {fmt}")
+        return fname
+
+
+def print_summary(result):
+    """The per-board means printed at the end of a run."""
+    print(f"Empty cells per board: mean {result.empty_stats.mean:.2f}, std {result.empty_stats.std:.2f}")
+    print(f"Mine clusters per board: mean {result.cluster_stats.mean:.2f}, std {result.cluster_stats.std:.2f}")
+    print(f"3BV per board: mean {result.bbbv_stats.mean:.2f}, std {result.bbbv_stats.std:.2f}")
+    print(f"Cells opened by the first click: mean {result.opening_stats.mean:.2f},"
+          f" std {result.opening_stats.std:.2f} (hit a mine on {100 * result.opening_hist[0] / result.num_boards:.2f}%"
+          f" of boards)")
+
+
+def print_progress(boards_done, num_boards, elapsed):
+    """One progress line with throughput and an ETA."""
+    rate = boards_done / elapsed if elapsed > 0 else 0.0
+    eta = (num_boards - boards_done) / rate if rate > 0 else 0.0
+    print(f"  {boards_done}/{num_boards} boards ({100 * boards_done / num_boards:.1f}%)"
+          f" | {rate:,.0f} boards/sec | ETA {eta:.1f}s")
+
+
+def analytics_mode(rows, cols, nBombs, num_boards=1000, seed=None, workers=1, cache=True,
+                   plots=True, save_format=None, solver_games=0, profile=False, profile_file=None, policy="none",
+                   output_dir=None):
     """
     Runs analytics for a given configuration by generating 'num_boards'.
-    Saves the 4 plots to .png files.
-    """
-    print(f"\nRunning analytics: {num_boards} boards of size {rows}x{cols} with {nBombs} mines...")
-
-  
-    board_generator = Minesweeper(rows=rows, cols=cols, nBombs=nBombs)
-
-    # --- Data acummulators ---
-    empty_counts = [] # Stores count of '0' cells for each board
-    number_counts = Counter() # Stores total counts of '0', '1', '2' etc.
-    cluster_counts = [] # Stores cluster count for each board
-    # This 2D array will sum the 3x3 neighborhood mine counts for all boards
-    neighbourhood_sum = np.zeros((rows, cols), dtype=int)
-
-  
-    for _ in range(num_boards):
-        # Place mines with 'safe=None' for an unbiased random distribution
-        board_generator.place_mines(safe=None)
-
-        # -- 1. White Cells --
-        empty_count = sum(1 for r in range(rows) for c in range(cols) if board_generator.values[r][c] == 0)
-        empty_counts.append(empty_count)
-
-        # -- 2. Number Distribution --
-        for r in range(rows):
-            for c in range(cols):
-                val = board_generator.values[r][c]
-                if val >= 0: # Only count 0-8, not -1 (mines)
-                    number_counts[val] += 1
-
-        # -- 3. Mine Clusters --
-        clusters = count_mine_clusters(board_generator.mines, rows, cols)
-        cluster_counts.append(clusters)
-
-        # -- 4. Neighborhood Heatmap --
-        for r in range(rows):
-            for c in range(cols):
-              
-                neighborhood_mine_count = 0
-                for dr in (-1, 0, 1):
-                    for dc in (-1, 0, 1):
-                        nr, nc = r + dr, c + dc
-                        if 0 <= nr < rows and 0 <= nc < cols and (nr, nc) in board_generator.mines:
-                            neighborhood_mine_count += 1
-                # Add this cell's 3x3 count to the total sum
-                neighbourhood_sum[r, c] += neighborhood_mine_count
+    Boards are generated in batches of BATCH_SIZE as NumPy tensors (large
+    boards in sub-chunks of at most CELL_BUDGET cells);
+    'seed' makes a run reproducible, and any single board of it can be
+    regenerated with board_at.
+    'policy' picks the first click of every board (see FIRST_CLICK_POLICIES):
+    "none" gives unbiased boards, the others keep the safe-first-click zone
+    clear of mines as in real games. The opening size (cells revealed by the
+    first click) is measured for every board.
+    With workers > 1 the batches are spread over a process pool; the
+    results are the same for a given seed whatever the number of workers.
+    Boards are consumed batch by batch into fixed-size histograms, so
+    memory use does not grow with 'num_boards' (nor much with the board size).
+    Seeded runs are cached on disk (see analytics_cache); a cached run with
+    fewer boards is extended instead of recomputed.
+    Saves the 7 plots to .png files (drawn in parallel with workers > 1)
+    unless 'plots' is False; 'save_format' ("npz" or "json") also saves the
+    raw results. Files go to 'output_dir' (created if needed), or to the
+    current directory by default. With 'solver_games' the solver also plays that many games
+    to measure its win rate on this configuration. Returns an AnalyticsResult.
+    With 'profile' every stage (generation, each statistic, merging, cache,
+    solver, plotting) is timed; the breakdown is printed at the end and kept
+    in result.timings. 'profile_file' also dumps a cProfile of the run there
+    (main process only; open it with pstats).
+    """
+    profiler = None
+    if profile_file:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    timer = StageTimer(enabled=profile or bool(profile_file))
+    started = time.perf_counter()
+    if policy not in FIRST_CLICK_POLICIES:
+        raise ValueError(f"Unknown first-click policy: {policy}")
+    print(f"\nRunning analytics: {num_boards} boards of size {rows}x{cols} with {nBombs} mines"
+          f" (first click: {policy})...")
+
+    # Caching only makes sense when the boards can be reproduced
+    use_cache = cache and seed is not None
+    acc = None
+    if use_cache:
+        with timer.stage("cache"):
+            cached = analytics_cache.load(rows, cols, nBombs, seed, num_boards, policy=policy)
+        # Entries written before a statistic was added lack its arrays: recompute those
+        if cached is not None and set(cached) == set(empty_accumulators(rows, cols, nBombs)):
+            acc = accumulators_from_arrays(cached)
+
+    computed = acc is None or acc["num_boards"] < num_boards
+    if acc is None:
+        acc = collect(rows, cols, nBombs, num_boards, seed, workers, timer=timer, policy=policy)
+    elif acc["num_boards"] < num_boards:
+        print(f"Extending cached run of {acc['num_boards']} boards...")
+        merge_accumulators(acc, collect(rows, cols, nBombs, num_boards, seed, workers,
+                                        first_board=acc["num_boards"], timer=timer, policy=policy))
+    else:
+        print("Loaded from cache.")
+
+    if use_cache and computed:
+        with timer.stage("cache"):
+            analytics_cache.save(rows, cols, nBombs, seed, accumulators_to_arrays(acc), policy=policy)
+
+    result = AnalyticsResult.from_accumulators(rows, cols, nBombs, seed, acc, policy)
+    print_summary(result)
+    if solver_games:
+        result.solver_games = solver_games
+        with timer.stage("solver", items=solver_games, unit="games"):
+            result.solver_win_rate = win_rate(rows, cols, nBombs, solver_games, seed, timer=timer)
+        print(f"Solver win rate: {100 * result.solver_win_rate:.1f}% over {solver_games} games")
+    print("Analytics complete.")
+
+    if save_format is not None:
+        with timer.stage("save"):
+            fname = result.save(save_format, output_dir)
+        print(f"Results saved: {fname}")
 
     # --- Plotting ---
-    print("Analytics complete. Saving plots...")
-
-    # 1) Histogram of empty (white) cells
-    plt.figure(figsize=(10, 6))
-    plt.hist(empty_counts, bins=range(min(empty_counts), max(empty_counts) + 2), alpha=0.7, edgecolor='black')
-    plt.title(f"Distribution of Empty (0) Cells Per Board ({rows}x{cols}, {nBombs} mines)")
-    plt.xlabel("Number of Empty Cells")
-    plt.ylabel("Frequency (out of {num_boards} boards)")
-    plt.grid(True)
-    hist_fname = f"empty_cells_hist_{rows}x{cols}x{nBombs}.png"
-    plt.savefig(hist_fname)
-    plt.close()
-
-    # 2) Distribution of cell numbers
-    numbers = sorted(k for k in number_counts.keys() if k >= 0)
-    # Get the *average* count per board by dividing by num_boards
-    counts = [number_counts[k] / num_boards for k in numbers]
-    plt.figure(figsize=(10, 6))
-    plt.bar(numbers, counts, edgecolor='black')
-    plt.title(f"Average Cell Values Per Board ({rows}x{cols}, {nBombs} mines)")
-    plt.xlabel("Cell Value (0 = blank)")
-    plt.ylabel("Average Count Per Board")
-    plt.grid(True)
-    numbers_fname = f"number_cells_dist_{rows}x{cols}x{nBombs}.png"
-    plt.savefig(numbers_fname)
-    plt.close()
-
-    # 3) Histogram of mine clusters
-    plt.figure(figsize=(10, 6))
-    plt.hist(cluster_counts, bins=range(min(cluster_counts), max(cluster_counts) + 2), alpha=0.7, edgecolor='black')
-    plt.title(f"Distribution of Mine Clusters Per Board ({rows}x{cols}, {nBombs} mines)")
-    plt.xlabel("Number of Mine Clusters")
-    plt.ylabel("Frequency (out of {num_boards} boards)")
-    plt.grid(True)
-    clusters_fname = f"mine_clusters_hist_{rows}x{cols}x{nBombs}.png"
-    plt.savefig(clusters_fname)
-    plt.close()
-
-    # 4) Heatmap of 3x3 neighborhood mine count
-    plt.figure(figsize=(12, 9)) # Adjusted figsize for better layout
-    # Get the average by dividing the sum by num_boards
-    neighbourhood_avg = neighbourhood_sum / num_boards
-    plt.imshow(neighbourhood_avg, interpolation='nearest', cmap='viridis')
-    plt.colorbar(label="Average mines in 3x3 neighbourhood")
-    plt.title(f"Average 3x3 Neighbourhood Mine Count ({rows}x{cols}, {nBombs} mines)")
-    heatmap_fname = f"mine_neighbourhood_heatmap_{rows}x{cols}x{nBombs}.png"
-    plt.savefig(heatmap_fname)
-    plt.close()
-
-    print("Plots saved:")
-    print(f" - {hist_fname}")
-    print(f" - {numbers_fname}")
-    print(f" - {clusters_fname}")
-    print(f" - {heatmap_fname}\n")
\ No newline at end of file
+    if plots:
+        print("Saving plots...")
+        with timer.stage("plotting"):
+            fnames = render(result, workers=workers, output_dir=output_dir)
+        print("Plots saved:")
+        for fname in fnames:
+            print(f" - {fname}")
+        print()
+
+    if timer.enabled:
+        wall_time = time.perf_counter() - started
+        timer.print_summary(wall_time)
+        result.timings = timer.summary(wall_time)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(profile_file)
+        print(f"cProfile stats saved: {profile_file}")
+    return result
@@ -0,0 +1,93 @@
+# analytics_cache.py
+
+# This module keeps the raw accumulators of seeded analytics runs on disk,
+# so re-running a configuration (e.g. just to redraw the plots) is instant.
+
+
+import os
+import re
+import numpy as np
+
+# Cache directory, next to the source files
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "analytics_cache")
+# Total size the cache may grow to before the least recently used entries are deleted
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+# Part of every entry's name. Bump it whenever board generation or the
+# accumulators change, so entries written by older code are never loaded
+# (they are left to the LRU eviction).
+CACHE_VERSION = 2
+
+
+def _prefix(rows, cols, nBombs, seed, policy):
+    """File name prefix shared by all entries of one (config, seed, policy) and cache version."""
+    return f"v{CACHE_VERSION}_{rows}x{cols}x{nBombs}_seed{seed}_{policy}_n"
+
+
+def _entries(prefix, cache_dir):
+    """(num_boards, path) of every cached entry starting with 'prefix'."""
+    if not os.path.isdir(cache_dir):
+        return []
+    pattern = re.compile(re.escape(prefix) + r"(\d+)\.npz$")
+    entries = []
+    for fname in os.listdir(cache_dir):
+        match = pattern.match(fname)
+        if match:
+            entries.append((int(match.group(1)), os.path.join(cache_dir, fname)))
+    return entries
+
+
+def load(rows, cols, nBombs, seed, num_boards, policy="none", cache_dir=CACHE_DIR):
+    """
+    Returns the cached arrays with the most boards, but no more than
+    'num_boards', for this key (or None).
+    The caller can extend a smaller run up to 'num_boards'.
+    """
+    entries = [e for e in _entries(_prefix(rows, cols, nBombs, seed, policy), cache_dir) if e[0] <= num_boards]
+    if not entries:
+        return None
+
+    _, path = max(entries)
+    try:
+        with np.load(path) as data:
+            arrays = {key: data[key] for key in data.files}
+    except (OSError, ValueError):
+        # Unreadable entry: drop it and recompute
+        os.remove(path)
+        return None
+
+    os.utime(path) # Mark as recently used for the LRU eviction
+    return arrays
+
+
+def save(rows, cols, nBombs, seed, arrays, policy="none", cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """
+    Stores the arrays of a finished run (arrays["num_boards"] is part of the key),
+    then evicts the least recently used entries while the cache is over 'max_bytes'.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    num_boards = int(arrays["num_boards"])
+    path = os.path.join(cache_dir, f"{_prefix(rows, cols, nBombs, seed, policy)}{num_boards}.npz")
+
+    # Write to a temp file and rename, so a crash never leaves a half-written entry
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp_path, path)
+
+    evict(cache_dir, max_bytes)
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """Deletes the least recently used entries until the cache fits in 'max_bytes'."""
+    entries = []
+    for fname in os.listdir(cache_dir):
+        if fname.endswith(".npz"):
+            stat = os.stat(os.path.join(cache_dir, fname))
+            entries.append((stat.st_mtime, stat.st_size, fname))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, fname in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(os.path.join(cache_dir, fname))
+        total -= size
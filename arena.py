@@ -0,0 +1,223 @@
+# arena.py
+
+# This module load-tests the game engines with self-play: many games driven by bots
+# (random clicks or the solver) over a thread or process pool, timing every
+# reveal/toggle_flag call to get a realistic latency profile of the hot paths.
+#
+#   python arena.py --games 2000 --bot solver --workers 8
+#   python arena.py --games 5000 --bot random --executor thread --engine compact
+
+
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from analytics import run_batches
+from compact_minesweeper import CompactMinesweeper
+from minesweeper_game import Minesweeper
+from solver import Solver
+
+ENGINES = {
+    "minesweeper": Minesweeper,
+    "compact": CompactMinesweeper,
+}
+BOTS = ("random", "solver", "mixed")
+EXECUTORS = ("process", "thread")
+# Latency percentiles in the report
+PERCENTILES = (50, 90, 99, 99.9)
+# Games per job; small enough to balance the pool, large enough to keep the overhead low
+CHUNK_GAMES = 50
+
+
+class RandomBot:
+    """
+    Clicks hidden cells in a random order until the game is won or lost.
+    The first click (the board center) uses the safe-first-click rule, like
+    Solver.play, so games do not all end on the first move.
+    """
+
+    def __init__(self, game, rng):
+        self.game = game
+        self.rng = rng
+        self.moves = 0
+        self.guesses = 0 # Every click after the first is a guess
+
+    def play(self):
+        game = self.game
+        first_click = (game.rows // 2, game.cols // 2)
+        if not game.first_click:
+            game.place_mines(safe=first_click)
+            game.first_click = True
+
+        opened = set() # Flat indices, from take_changes
+        order = self.rng.permutation(game.rows * game.cols)
+        for i in [first_click[0] * game.cols + first_click[1], *order.tolist()]:
+            if i in opened:
+                continue
+            self.moves += 1
+            if game.reveal(*divmod(i, game.cols)):
+                return False
+            opened.update(game.take_changes().tolist())
+            if game.won():
+                return True
+            self.guesses += 1
+        return game.won()
+
+
+def record_latencies(game, samples, methods=("reveal", "toggle_flag")):
+    """
+    Wraps the given methods of one game instance so the duration of every call
+    (in nanoseconds) is appended to samples[method]. Like instrument_game, but
+    keeping each sample for the percentiles instead of a running total.
+    """
+    for name in methods:
+        method = getattr(game, name)
+        durations = samples.setdefault(name, [])
+
+        def timed(*args, _method=method, _durations=durations, **kwargs):
+            started = time.perf_counter_ns()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                _durations.append(time.perf_counter_ns() - started)
+
+        setattr(game, name, timed)
+    return game
+
+
+def play_games(rows, cols, nBombs, seeds, bot="solver", engine="minesweeper"):
+    """
+    Plays one game per seed and returns their totals, with every call latency:
+    {"games", "wins", "moves", "guesses", "reveal_ns", "toggle_flag_ns", "bots"}.
+    With bot "mixed", even seeds get the solver and odd ones the random bot.
+    Runs in a worker of the arena's pool.
+    """
+    samples = {"reveal": [], "toggle_flag": []}
+    totals = {"games": 0, "wins": 0, "moves": 0, "guesses": 0, "bots": {}}
+    for seed in seeds:
+        game = record_latencies(ENGINES[engine](rows=rows, cols=cols, nBombs=nBombs, seed=seed), samples)
+        kind = bot if bot != "mixed" else ("solver" if seed % 2 == 0 else "random")
+        if kind == "solver":
+            player = Solver(game)
+        else:
+            # Its own stream, so the clicks are independent of the mine layout
+            player = RandomBot(game, np.random.default_rng([seed, 1]))
+        won = player.play()
+
+        totals["games"] += 1
+        totals["wins"] += won
+        totals["moves"] += player.moves
+        totals["guesses"] += player.guesses
+        games, wins = totals["bots"].get(kind, (0, 0))
+        totals["bots"][kind] = (games + 1, wins + won)
+    totals["reveal_ns"] = np.array(samples["reveal"], dtype=np.int64)
+    totals["toggle_flag_ns"] = np.array(samples["toggle_flag"], dtype=np.int64)
+    return totals
+
+
+def latency_summary(durations_ns, percentiles=PERCENTILES):
+    """{"calls", "mean_us", "p50_us", ..., "max_us"} of call latencies given in nanoseconds."""
+    if durations_ns.size == 0:
+        return {"calls": 0}
+    summary = {"calls": int(durations_ns.size), "mean_us": float(durations_ns.mean()) / 1000}
+    for p, value in zip(percentiles, np.percentile(durations_ns, percentiles)):
+        summary[f"p{p:g}_us"] = float(value) / 1000
+    summary["max_us"] = float(durations_ns.max()) / 1000
+    return summary
+
+
+def run_arena(rows, cols, nBombs, games=1000, bot="solver", workers=1, executor="process",
+              engine="minesweeper", seed=0):
+    """
+    Plays 'games' bot games (game i uses seed + i) spread over 'workers'
+    threads or processes, and returns the report: throughput (moves/sec over
+    the wall time, plus the share of it spent inside the engine calls),
+    reveal/toggle_flag latency percentiles and win/loss statistics per bot.
+    Threads share one interpreter, so they mostly show how the engine behaves
+    under interleaved games; processes show the throughput of the machine.
+    """
+    if bot not in BOTS:
+        raise ValueError(f"Unknown bot: {bot}")
+    chunks = [range(first, min(first + CHUNK_GAMES, seed + games)) for first in range(seed, seed + games, CHUNK_GAMES)]
+    jobs = [(rows, cols, nBombs, chunk, bot, engine) for chunk in chunks]
+
+    started = time.perf_counter()
+    parts = run_batches(play_games, jobs, workers,
+                        executor_class=ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor)
+    wall_time = time.perf_counter() - started
+
+    reveal_ns = np.concatenate([part["reveal_ns"] for part in parts])
+    flag_ns = np.concatenate([part["toggle_flag_ns"] for part in parts])
+    wins = sum(part["wins"] for part in parts)
+    moves = sum(part["moves"] for part in parts)
+    bots = {}
+    for part in parts:
+        for kind, (kind_games, kind_wins) in part["bots"].items():
+            total_games, total_wins = bots.get(kind, (0, 0))
+            bots[kind] = (total_games + kind_games, total_wins + kind_wins)
+
+    engine_seconds = (int(reveal_ns.sum()) + int(flag_ns.sum())) / 1e9
+    return {
+        "config": f"{rows}x{cols}x{nBombs}",
+        "bot": bot,
+        "engine": engine,
+        "executor": executor if workers > 1 else "serial",
+        "workers": workers,
+        "games": games,
+        "wall_seconds": wall_time,
+        "games_per_sec": games / wall_time,
+        "moves_per_sec": moves / wall_time,
+        # Summed over workers, so with a pool this can exceed the wall time
+        "engine_seconds": engine_seconds,
+        "wins": wins,
+        "losses": games - wins,
+        "win_rate": wins / games,
+        "moves_per_game": moves / games,
+        "guesses_per_game": sum(part["guesses"] for part in parts) / games,
+        "bots": {kind: {"games": kind_games, "win_rate": kind_wins / kind_games}
+                 for kind, (kind_games, kind_wins) in sorted(bots.items())},
+        "reveal": latency_summary(reveal_ns),
+        "toggle_flag": latency_summary(flag_ns),
+    }
+
+
+def print_report(report):
+    print(f"\nArena: {report['games']} {report['bot']} games on {report['config']} "
+          f"({report['engine']}, {report['workers']} worker(s), {report['executor']})")
+    print(f"  {report['wall_seconds']:.2f}s wall: {report['games_per_sec']:,.1f} games/sec, "
+          f"{report['moves_per_sec']:,.0f} moves/sec, {report['engine_seconds']:.2f}s inside engine calls")
+    print(f"  Wins {report['wins']}, losses {report['losses']} (win rate {100 * report['win_rate']:.1f}%), "
+          f"{report['moves_per_game']:.1f} moves and {report['guesses_per_game']:.2f} guesses per game")
+    if len(report["bots"]) > 1:
+        for kind, row in report["bots"].items():
+            print(f"    {kind:7s} {row['games']} games, win rate {100 * row['win_rate']:.1f}%")
+    for method in ("reveal", "toggle_flag"):
+        row = report[method]
+        if not row["calls"]:
+            continue
+        percentiles = "  ".join(f"p{p:g} {row[f'p{p:g}_us']:8.1f}" for p in PERCENTILES)
+        print(f"  {method:11s} {row['calls']:9d} calls  mean {row['mean_us']:8.1f}  {percentiles}"
+              f"  max {row['max_us']:9.1f}  (us)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Self-play load test of the Minesweeper engines")
+    parser.add_argument("--rows", type=int, default=16)
+    parser.add_argument("--cols", type=int, default=16)
+    parser.add_argument("--mines", type=int, default=40)
+    parser.add_argument("--games", type=int, default=1000, help="games to play (default: 1000)")
+    parser.add_argument("--bot", choices=BOTS, default="solver", help="mixed: half solver, half random")
+    parser.add_argument("--workers", type=int, default=1, help="threads or processes (default: 1)")
+    parser.add_argument("--executor", choices=EXECUTORS, default="process")
+    parser.add_argument("--engine", choices=ENGINES, default="minesweeper")
+    parser.add_argument("--seed", type=int, default=0, help="game i uses seed + i (default: 0)")
+    args = parser.parse_args(argv)
+
+    print_report(run_arena(args.rows, args.cols, args.mines, args.games, args.bot, args.workers,
+                           args.executor, args.engine, args.seed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+# benchmarks.py
+
+# This module is a standalone benchmark runner for the hot paths: mine placement,
+# reveal, cluster counting and the analytics pipeline, on the three presets plus
+# large custom boards. Results go to JSON and can be checked against a baseline.
+#
+#   python benchmarks.py                      run everything, save benchmark_results.json
+#   python benchmarks.py --quick              smaller workloads, for a fast check
+#   python benchmarks.py --baseline old.json  fail (exit 1) on regressions
+
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from analytics import analytics_mode, count_mine_clusters
+from clusters import cluster_stats_batch
+from compact_minesweeper import CompactMinesweeper
+from minesweeper_game import PRESETS, Minesweeper, generate_boards
+from solver import solve_game
+
+# Large custom boards (about the Expert mine density); these use CompactMinesweeper
+LARGE_BOARDS = {
+    "large_500": (500, 500, 51_500),
+    "large_2000": (2000, 2000, 824_000),
+}
+
+RESULTS_FILE = "benchmark_results.json"
+# A case regresses when its throughput drops by more than this fraction
+DEFAULT_THRESHOLD = 0.10
+# Each case is timed this many times and the best run is kept
+REPEATS = 3
+
+
+# -----------------------
+# Workloads
+# -----------------------
+# Every workload function takes its parameters and returns the number of
+# operations (boards, moves, games) it performed, or (operations, seconds)
+# when only part of its work should be timed.
+
+def place_mines_workload(rows, cols, nBombs, count, engine):
+    """Creates 'count' games and places their mines (safe first click at the center)."""
+    for i in range(count):
+        game = engine(rows=rows, cols=cols, nBombs=nBombs, seed=i)
+        game.place_mines(safe=(rows // 2, cols // 2))
+    return count
+
+
+def reveal_workload(rows, cols, nBombs, count, engine, max_moves=None):
+    """
+    Clears 'count' boards by revealing every safe cell in a random order
+    (cells already opened by a flood fill are revealed again, as a player would click),
+    stopping after 'max_moves' per board if given.
+    Only the reveal calls are timed; returns (moves, seconds).
+    """
+    moves = 0
+    elapsed = 0.0
+    for i in range(count):
+        game = engine(rows=rows, cols=cols, nBombs=nBombs, seed=i)
+        game.place_mines(safe=(rows // 2, cols // 2))
+        if hasattr(game, "mine_mask"):
+            mines = game.mine_mask.reshape(rows, cols) == 1
+        else:
+            mines = np.zeros((rows, cols), dtype=bool)
+            for r, c in game.mines:
+                mines[r, c] = True
+        order = np.argwhere(~mines)
+        np.random.default_rng(i).shuffle(order)
+        clicks = [(int(r), int(c)) for r, c in order[:max_moves]]
+
+        started = time.perf_counter()
+        for r, c in clicks:
+            game.reveal(r, c)
+            moves += 1
+            if game.won():
+                break
+        elapsed += time.perf_counter() - started
+    return moves, elapsed
+
+
+def clusters_workload(rows, cols, nBombs, count):
+    """count_mine_clusters on 'count' boards, one at a time (the per-board API)."""
+    mines, _ = generate_boards(rows, cols, nBombs, count, rng=0)
+    for board in mines:
+        count_mine_clusters({(int(r), int(c)) for r, c in np.argwhere(board)}, rows, cols)
+    return count
+
+
+def clusters_batch_workload(rows, cols, nBombs, count):
+    """cluster_stats_batch on one batch of 'count' boards."""
+    mines, _ = generate_boards(rows, cols, nBombs, count, rng=0)
+    cluster_stats_batch(mines)
+    return count
+
+
+def analytics_workload(rows, cols, nBombs, count):
+    """A full analytics run without cache, plots or console output."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        analytics_mode(rows, cols, nBombs, num_boards=count, seed=0, cache=False, plots=False)
+    return count
+
+
+def solver_workload(rows, cols, nBombs, count):
+    """'count' solver games."""
+    for i in range(count):
+        solve_game(rows, cols, nBombs, seed=i)
+    return count
+
+
+def build_cases(quick=False):
+    """
+    All benchmark cases as {name: (unit, workload, args)}.
+    'quick' shrinks the workloads (and skips the largest board).
+    """
+    scale = 0.1 if quick else 1.0
+    n = lambda count: max(1, int(count * scale))
+
+    cases = {}
+    for name, (rows, cols, nBombs) in PRESETS.items():
+        cases[f"place_mines/{name}"] = ("boards", place_mines_workload, (rows, cols, nBombs, n(2000), Minesweeper))
+        cases[f"reveal/{name}"] = ("moves", reveal_workload, (rows, cols, nBombs, n(200), Minesweeper))
+        cases[f"count_mine_clusters/{name}"] = ("boards", clusters_workload, (rows, cols, nBombs, n(2000)))
+        cases[f"cluster_stats_batch/{name}"] = ("boards", clusters_batch_workload, (rows, cols, nBombs, n(20_000)))
+        cases[f"analytics/{name}"] = ("boards", analytics_workload, (rows, cols, nBombs, n(50_000)))
+        cases[f"solver/{name}"] = ("games", solver_workload, (rows, cols, nBombs, n(100)))
+
+    for name, (rows, cols, nBombs) in LARGE_BOARDS.items():
+        if quick and rows * cols > 1_000_000:
+            continue
+        cases[f"place_mines/{name}"] = ("boards", place_mines_workload, (rows, cols, nBombs, 2, CompactMinesweeper))
+        cases[f"reveal/{name}"] = ("moves", reveal_workload, (rows, cols, nBombs, 1, CompactMinesweeper, n(20_000)))
+        cases[f"cluster_stats_batch/{name}"] = ("boards", clusters_batch_workload, (rows, cols, nBombs, 2))
+    return cases
+
+
+# -----------------------
+# Runner
+# -----------------------
+
+def run_case(unit, workload, args, repeats=REPEATS):
+    """
+    Times a workload 'repeats' times (best run wins), then runs it once more
+    under tracemalloc for the peak memory, so tracing never skews the timing.
+    """
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        done = workload(*args)
+        elapsed = time.perf_counter() - started
+        if isinstance(done, tuple):
+            done, elapsed = done # The workload timed its own hot loop
+        rate = done / elapsed if elapsed > 0 else float("inf")
+        if best is None or rate > best["ops_per_sec"]:
+            best = {"unit": unit, "ops": done, "seconds": elapsed, "ops_per_sec": rate}
+
+    tracemalloc.start()
+    try:
+        workload(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    best["peak_bytes"] = peak
+    return best
+
+
+def run_benchmarks(cases, only=None, repeats=REPEATS):
+    """Runs the cases whose name contains one of the 'only' substrings (all by default)."""
+    results = {}
+    for name, (unit, workload, args) in cases.items():
+        if only and not any(part in name for part in only):
+            continue
+        result = run_case(unit, workload, args, repeats)
+        results[name] = result
+        print(f"{name:32s} {result['ops_per_sec']:14,.1f} {unit}/sec"
+              f"   peak {result['peak_bytes'] / 2**20:8.1f} MiB")
+    return results
+
+
+def save_results(results, path=RESULTS_FILE):
+    """Saves results with enough context to judge a later comparison."""
+    data = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "machine": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+    return path
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares throughput against a baseline results file (as saved by save_results).
+    Prints one line per shared case and returns the names that got slower by
+    more than 'threshold' (a fraction, e.g. 0.10 for 10%).
+    """
+    regressions = []
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        change = result["ops_per_sec"] / old["ops_per_sec"] - 1.0
+        status = "ok"
+        if change < -threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        print(f"{name:32s} {change:+7.1%}  {status}")
+    return regressions
+
+
+def add_arguments(parser):
+    """Adds the benchmark options to 'parser' (also used by the 'bench' command of main.py)."""
+    parser.add_argument("--quick", action="store_true", help="smaller workloads, skip the largest board")
+    parser.add_argument("--only", nargs="*", help="run only cases whose name contains one of these")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="timed runs per case (best is kept)")
+    parser.add_argument("--output", default=RESULTS_FILE, help="where to save the JSON results")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed throughput drop before a case counts as a regression (fraction)")
+
+
+def run(args):
+    """Runs the benchmarks for parsed arguments; returns the exit code (1 on regressions)."""
+    results = run_benchmarks(build_cases(args.quick), args.only, args.repeats)
+    print(f"\nResults saved: {save_results(results, args.output)}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.baseline} (threshold {args.threshold:.0%}):")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Minesweeper performance benchmarks")
+    add_arguments(parser)
+    return run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
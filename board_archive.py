@@ -0,0 +1,261 @@
+# board_archive.py
+
+# This module saves generated boards to a memory-mapped archive file (one bit per
+# cell), so new statistics can be computed over the same sample of boards many
+# times without generating them again.
+
+
+import os
+import sys
+import time
+import numpy as np
+from analytics import (BATCH_SIZE, FIRST_CLICK_POLICIES, AnalyticsResult, analyse_mines, batch_seeds,
+                       chunk_boards, empty_accumulators, first_clicks, merge_accumulators, policy_safe,
+                       print_summary, run_batches, sub_chunks)
+from minesweeper_game import generate_boards
+from instrumentation import StageTimer
+from plots import render
+
+MAGIC = b"MSBA"
+VERSION = 1
+
+# Fixed 64-byte header, then 'count' boards of ceil(rows*cols / 8) bytes each:
+# the row-major mine mask of a board, packed with np.packbits.
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u2"),
+    ("has_seed", "u1"), # 0 when the boards came from an unseeded run
+    ("policy", "u1"), # First-click policy, as an index into FIRST_CLICK_POLICIES (0 = "none")
+    ("rows", "<u4"),
+    ("cols", "<u4"),
+    ("nBombs", "<u4"),
+    ("pad", "<u4"),
+    ("count", "<u8"),
+    ("seed", "<u8"), # Master seed; drawn at random for unseeded runs, to recompute random first clicks
+    ("unused", "S24"),
+])
+HEADER_BYTES = HEADER_DTYPE.itemsize
+
+
+def board_bytes(rows, cols):
+    """Bytes taken by one packed board."""
+    return -(-rows * cols // 8) # ceil division
+
+
+def read_header(path):
+    """The archive's header as a dict (rows, cols, nBombs, seed, policy, count)."""
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_BYTES)
+    if len(raw) < HEADER_BYTES:
+        raise ValueError(f"{path} is too short to be a board archive")
+    header = np.frombuffer(raw, dtype=HEADER_DTYPE)[0]
+    if header["magic"] != MAGIC or header["version"] != VERSION:
+        raise ValueError(f"{path} is not a board archive")
+    if header["policy"] >= len(FIRST_CLICK_POLICIES):
+        raise ValueError(f"{path} has an unknown first-click policy ({header['policy']})")
+    info = {
+        "rows": int(header["rows"]),
+        "cols": int(header["cols"]),
+        "nBombs": int(header["nBombs"]),
+        "seed": int(header["seed"]) if header["has_seed"] else None,
+        "policy": FIRST_CLICK_POLICIES[header["policy"]],
+        "master_seed": int(header["seed"]),
+        "count": int(header["count"]),
+    }
+    expected = HEADER_BYTES + info["count"] * board_bytes(info["rows"], info["cols"])
+    if os.path.getsize(path) < expected:
+        raise ValueError(f"{path} is truncated ({os.path.getsize(path)} of {expected} bytes)")
+    return info
+
+
+def open_boards(path, mode="r"):
+    """(header, packed) where 'packed' is a (count, board_bytes) uint8 memory map of the boards."""
+    info = read_header(path)
+    packed = np.memmap(path, dtype=np.uint8, mode=mode, offset=HEADER_BYTES,
+                       shape=(info["count"], board_bytes(info["rows"], info["cols"])))
+    return info, packed
+
+
+def unpack_boards(packed, rows, cols):
+    """Bool (n, rows, cols) mine masks from n packed boards."""
+    bits = np.unpackbits(packed, axis=1, count=rows * cols)
+    return bits.view(bool).reshape(-1, rows, cols)
+
+
+def archive_clicks(info, first_board, num_boards):
+    """
+    First clicks (num_boards, 2) of boards first_board.. of an archive, under
+    its policy: the same clicks analyse_batch draws for those boards, taken
+    from each batch's stream of the master seed.
+    """
+    rows, cols = info["rows"], info["cols"]
+    parts = []
+    board, end = first_board, first_board + num_boards
+    while board < end:
+        batch, skip = divmod(board, BATCH_SIZE)
+        size = min(end, (batch + 1) * BATCH_SIZE) - board
+        # Same as batch_seeds(seed, n)[batch] for any n > batch
+        seed_seq = np.random.SeedSequence(info["master_seed"], spawn_key=(batch,))
+        parts.append(first_clicks(rows, cols, size, info["policy"], seed_seq, skip))
+        board += size
+    return np.concatenate(parts) if parts else np.zeros((0, 2), dtype=np.int64)
+
+
+# -----------------------
+# Export
+# -----------------------
+
+def _export_batch(path, first_board, num_boards, rows, cols, nBombs, seed_seq, policy="none"):
+    """Generates one batch and writes it into its slot of the archive; runs in a worker when workers > 1."""
+    clicks = first_clicks(rows, cols, num_boards, policy, seed_seq)
+    rng = np.random.default_rng(seed_seq)
+    _, packed = open_boards(path, mode="r+")
+    # Large boards go in sub-chunks drawn in order from the batch's stream, as in analyse_batch
+    for start, stop in sub_chunks(rows, cols, num_boards):
+        mines, _ = generate_boards(rows, cols, nBombs, stop - start,
+                                   safe=policy_safe(policy, clicks[start:stop]), rng=rng)
+        packed[first_board + start:first_board + stop] = np.packbits(mines.reshape(stop - start, -1), axis=1)
+    packed.flush()
+    return num_boards
+
+
+def export_boards(path, rows, cols, nBombs, num_boards, seed=None, workers=1, policy="none"):
+    """
+    Generates the boards of an analytics run (same batches and random streams as
+    analytics_mode, so the same seed and first-click 'policy' give the same
+    boards) and writes them to an archive at 'path'. Every batch is written
+    into its own slot of the memory-mapped file, so batches can be generated
+    in parallel. The clicks themselves are not stored: they are drawn again
+    from the master seed when the archive is analysed.
+    Returns the archive's header dict.
+    """
+    if seed is not None and not 0 <= seed < 2**64:
+        raise ValueError("Archive seeds must fit in 64 bits.")
+    if policy not in FIRST_CLICK_POLICIES:
+        raise ValueError(f"Unknown first-click policy: {policy}")
+    # An unseeded run still needs a master seed for its random first clicks
+    master_seed = seed if seed is not None else int(np.random.SeedSequence().generate_state(1, np.uint64)[0])
+    size = HEADER_BYTES + num_boards * board_bytes(rows, cols)
+    print(f"\nExporting {num_boards} boards of size {rows}x{cols} with {nBombs} mines "
+          f"(first-click policy: {policy}) to {path} ({size / 2**20:.1f} MiB)...")
+
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header[0] = (MAGIC, VERSION, seed is not None, FIRST_CLICK_POLICIES.index(policy), rows, cols, nBombs, 0,
+                 num_boards, master_seed, b"")
+    # Write to a temp file and rename, so a crash never leaves a half-written archive
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.tobytes())
+        f.truncate(size) # Sparse until the batches fill it in
+
+    seeds = batch_seeds(master_seed, -(-num_boards // BATCH_SIZE)) # ceil division
+    jobs = [(tmp_path, i * BATCH_SIZE, min(BATCH_SIZE, num_boards - i * BATCH_SIZE), rows, cols, nBombs, s, policy)
+            for i, s in enumerate(seeds)]
+    run_batches(_export_batch, jobs, workers, lambda job, count: count, total=num_boards)
+
+    os.replace(tmp_path, path)
+    return read_header(path)
+
+
+# -----------------------
+# Analytics over an archive
+# -----------------------
+
+def iter_chunks(path, chunk_size=BATCH_SIZE, start=0, stop=None):
+    """
+    Yields (first_board, packed) for consecutive chunks of boards start..stop-1.
+    'packed' is a slice of the memory map, not a copy: pages are read from
+    disk only when the chunk is used.
+    """
+    info, packed = open_boards(path)
+    stop = info["count"] if stop is None else min(stop, info["count"])
+    for first in range(start, stop, chunk_size):
+        yield first, packed[first:min(first + chunk_size, stop)]
+
+
+def _analyse_chunk(path, start, stop, profile=False):
+    """
+    Accumulators of boards start..stop-1 of an archive; runs in a worker when
+    workers > 1. With 'profile' they carry the chunk's StageTimer under "timings".
+    """
+    info = read_header(path)
+    rows, cols, nBombs = info["rows"], info["cols"], info["nBombs"]
+    timer = StageTimer(enabled=profile)
+    acc = empty_accumulators(rows, cols, nBombs)
+    # Sub-chunks of the batch, cut where analyse_batch cuts them
+    for first, packed in iter_chunks(path, min(BATCH_SIZE, chunk_boards(rows, cols)), start, stop):
+        # Reading the pages from disk happens here too, on first touch
+        with timer.stage("unpack", items=len(packed)):
+            mines = unpack_boards(packed, rows, cols)
+            clicks = archive_clicks(info, first, len(packed))
+        merge_accumulators(acc, analyse_mines(rows, cols, nBombs, mines, timer, clicks))
+    if profile:
+        acc["timings"] = timer
+    return acc
+
+
+def analytics_from_archive(path, workers=1, plots=True, save_format=None, profile=False, output_dir=None):
+    """
+    Runs the analytics statistics over the boards of an archive, streaming it
+    in chunks of BATCH_SIZE boards. Chunks line up with analytics_mode's
+    batches, so an archive exported with a seed and first-click policy gives
+    the same results as analytics_mode with that seed and policy. 'profile'
+    prints the stage timings, as in analytics_mode. Plots and the saved
+    result go to 'output_dir' (the current directory by default).
+    Returns an AnalyticsResult.
+    """
+    timer = StageTimer(enabled=profile)
+    started = time.perf_counter()
+    info = read_header(path)
+    rows, cols, nBombs, count = info["rows"], info["cols"], info["nBombs"], info["count"]
+    print(f"\nRunning analytics on {path}: {count} boards of size {rows}x{cols} with {nBombs} mines "
+          f"(first-click policy: {info['policy']})...")
+
+    jobs = [(path, first, min(first + BATCH_SIZE, count), profile) for first in range(0, count, BATCH_SIZE)]
+    acc = empty_accumulators(rows, cols, nBombs)
+
+    def merge(job, part):
+        if profile:
+            timer.merge(part.pop("timings"))
+        with timer.stage("merge", items=part["num_boards"]):
+            merge_accumulators(acc, part)
+        return part["num_boards"]
+
+    # Merge in archive order, so the floating point stats come out the same too
+    run_batches(_analyse_chunk, jobs, workers, merge, total=count)
+
+    result = AnalyticsResult.from_accumulators(rows, cols, nBombs, info["seed"], acc, policy=info["policy"])
+    print_summary(result)
+    if save_format is not None:
+        with timer.stage("save"):
+            fname = result.save(save_format, output_dir)
+        print(f"Results saved: {fname}")
+    if plots:
+        print("Saving plots...")
+        with timer.stage("plotting"):
+            fnames = render(result, workers=workers, output_dir=output_dir)
+        print("Plots saved:")
+        for fname in fnames:
+            print(f" - {fname}")
+
+    if profile:
+        wall_time = time.perf_counter() - started
+        timer.print_summary(wall_time)
+        result.timings = timer.summary(wall_time)
+    return result
+
+
+if __name__ == "__main__":
+    # python board_archive.py export <archive> <rows> <cols> <mines> <boards> [seed] [workers] [policy]
+    # python board_archive.py analyse <archive> [workers] [output_dir]
+    command, archive = sys.argv[1], sys.argv[2]
+    if command == "export":
+        rows, cols, nBombs, num_boards = (int(arg) for arg in sys.argv[3:7])
+        # "-" leaves the run unseeded
+        seed = int(sys.argv[7]) if len(sys.argv) > 7 and sys.argv[7] != "-" else None
+        export_boards(archive, rows, cols, nBombs, num_boards, seed,
+                      workers=int(sys.argv[8]) if len(sys.argv) > 8 else 1,
+                      policy=sys.argv[9] if len(sys.argv) > 9 else "none")
+    else:
+        analytics_from_archive(archive, workers=int(sys.argv[3]) if len(sys.argv) > 3 else 1,
+                               output_dir=sys.argv[4] if len(sys.argv) > 4 else None)
@@ -0,0 +1,68 @@
+# board_metrics.py
+
+# This module scores the difficulty of solved boards. It works on the int8
+# 'values' layout (single board or batch) shared by all engines and generators.
+
+
+import numpy as np
+from clusters import label_components
+from minesweeper_game import count_neighbours
+
+
+def bbbv(values, zero_labels=None):
+    """
+    3BV ("Bechtel's Board Benchmark Value"): the minimum number of left clicks
+    needed to clear a board without flags. Every opening (8-connected region
+    of '0' cells) takes one click, and so does every numbered cell that no
+    opening reveals, i.e. with no '0' neighbor.
+    'values' is a (rows, cols) board or a (num_boards, rows, cols) batch;
+    returns an int, or an int64 array with one score per board.
+    'zero_labels' can pass in label_components(values == 0) when the caller
+    already has it.
+    """
+    values = np.asarray(values)
+    single = values.ndim == 2
+    if single:
+        values = values[None]
+    num_boards = values.shape[0]
+    board_cells = values[0].size if num_boards else 1
+
+    zero = values == 0
+    # Openings: one root per region, and roots are flat indices into the batch
+    labels = (label_components(zero) if zero_labels is None else np.asarray(zero_labels)).ravel()
+    roots = np.flatnonzero(labels == np.arange(labels.size))
+    openings = np.bincount(roots // board_cells, minlength=num_boards)
+    # Numbered cells that no opening borders
+    isolated = np.count_nonzero((values > 0) & (count_neighbours(zero) == 0), axis=(1, 2))
+
+    scores = openings + isolated
+    return int(scores[0]) if single else scores
+
+
+def opening_sizes(values, clicks, zero_labels=None):
+    """
+    Number of cells revealed by a first click, for a whole batch at once:
+    'values' is a (num_boards, rows, cols) batch and 'clicks' an int array
+    (num_boards, 2) with the clicked cell of every board. A mine reveals
+    nothing (0), a number only itself (1), and a '0' cell its whole opening
+    plus the numbers around it, as the flood fill in Minesweeper.reveal does.
+    The openings come from one labeling pass over the batch; 'zero_labels'
+    can pass in label_components(values == 0) when the caller already has it.
+    """
+    values = np.asarray(values)
+    num_boards, rows, cols = values.shape
+    clicks = np.asarray(clicks)
+    flat_clicks = clicks[:, 0] * cols + clicks[:, 1]
+    flat_values = values.reshape(num_boards, rows * cols)
+    clicked = flat_values[np.arange(num_boards), flat_clicks]
+
+    sizes = (clicked > 0).astype(np.int64)
+    opened = np.flatnonzero(clicked == 0)
+    if opened.size:
+        labels = label_components(values == 0) if zero_labels is None else np.asarray(zero_labels)
+        labels = labels.reshape(num_boards, rows * cols)[opened]
+        region = labels == labels[np.arange(opened.size), flat_clicks[opened]][:, None]
+        # The flood fill stops at the numbers bordering the opening: grow it by one cell
+        region = region.reshape(opened.size, rows, cols)
+        sizes[opened] = np.count_nonzero(count_neighbours(region, include_self=True) > 0, axis=(1, 2))
+    return sizes
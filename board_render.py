@@ -0,0 +1,147 @@
+# board_render.py
+
+# This module draws the board of a running game incrementally: a cached glyph
+# buffer is patched with the cells changed by the last move, and every frame
+# goes to the terminal in a single write.
+
+
+import shutil
+import sys
+import numpy as np
+
+# Display strings indexed by value + 1 (-1 = revealed mine ... 8)
+VALUE_GLYPHS = np.array(["-1 ", ". "] + [f"{v} " for v in range(1, 9)])
+
+# ANSI escape sequences
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+CLEAR_BELOW = "\x1b[J"
+# Terminal lines kept free under the board in ANSI mode: the prompt plus one
+# message line and the line the cursor moves to after it. More output than
+# that scrolls the screen, and the in-place writes would land on wrong cells.
+ANSI_SPARE_LINES = 3
+
+
+def move_cursor(line, column):
+    """ANSI sequence moving the cursor to a 1-based (line, column)."""
+    return f"\x1b[{line};{column}H"
+
+
+class BoardRenderer:
+    """
+    Incremental text renderer for a Minesweeper or CompactMinesweeper game.
+    By default every frame is the same text as game.display(), but only the
+    rows touched since the last frame are rebuilt. With 'ansi' the board is
+    drawn once and later frames rewrite just the changed cells in place; this
+    needs the whole frame on screen, so it falls back to full frames when the
+    board does not fit the terminal.
+    """
+
+    def __init__(self, game, ansi=False, out=None):
+        self.game = game
+        self.ansi = ansi
+        self.out = out or sys.stdout
+        rows, cols = game.rows, game.cols
+
+        # Row labels are right-aligned to the widest one (at least 2, like game.display())
+        self.label_width = max(2, len(str(rows - 1)))
+        # Cached glyph buffer and the row strings built from it
+        self.glyphs = np.full((rows, cols), "# ", dtype="<U3")
+        self.header = "\n" + " " * (self.label_width + 1) + " ".join(f"{i:2d}" for i in range(cols))
+        self.lines = [self._label(r) + "# " * cols for r in range(rows)]
+        if self.ansi and not self.fits_terminal():
+            self.ansi = False
+
+        self.drawn = False # ANSI mode: is the board on screen yet?
+        self.pending = np.zeros(0, dtype=np.int64) # ANSI mode: cells to rewrite
+
+        # Start from the game's current state, in case it is already under way
+        game.take_changes()
+        self._patch(np.arange(rows * cols))
+
+    def _label(self, r):
+        return f"{r:{self.label_width}d} "
+
+    def fits_terminal(self, size=None):
+        """
+        Whether a whole frame plus the prompt lines fits on a terminal of 'size'
+        (an os.terminal_size; the current terminal by default) without
+        wrapping or scrolling, as the in-place redraw requires.
+        """
+        size = size or shutil.get_terminal_size()
+        # The header (3 characters per column) is wider than the board rows
+        width = max(len(self.header) - 1, len(self.lines[0]) if self.lines else 0)
+        height = self.game.rows + 2 + ANSI_SPARE_LINES + 1 # blank line, header, rows, blank line
+        return width <= size.columns and height <= size.lines
+
+    def invalidate(self):
+        """Makes the next ANSI frame a full redraw, e.g. after other output scrolled the screen."""
+        self.drawn = False
+
+    def _cell_state(self, cells):
+        """(revealed, flagged, mine, value) arrays for flat cell indices."""
+        game = self.game
+        if hasattr(game, "revealed_mask"):
+            # Array-backed engine: plain gathers
+            return (game.revealed_mask[cells] == 1, game.flag_mask[cells] == 1,
+                    game.mine_mask[cells] == 1, game.flat_values[cells].astype(int))
+
+        coords = [divmod(int(i), game.cols) for i in cells]
+        revealed = np.array([cell in game.revealed for cell in coords], dtype=bool)
+        flagged = np.array([cell in game.flags for cell in coords], dtype=bool)
+        mine = np.array([cell in game.mines for cell in coords], dtype=bool)
+        value = np.array([game.values[r][c] for r, c in coords], dtype=int)
+        return revealed, flagged, mine, value
+
+    def _mine_cells(self):
+        game = self.game
+        if hasattr(game, "mine_mask"):
+            return np.flatnonzero(game.mine_mask)
+        return np.array([r * game.cols + c for r, c in game.mines], dtype=np.int64)
+
+    def update(self, reveal_mines=False):
+        """Patches the glyph buffer with the cells the game changed since the last update."""
+        cells = self.game.take_changes()
+        if reveal_mines:
+            cells = np.concatenate((cells, self._mine_cells()))
+        if cells.size:
+            self._patch(np.unique(cells), reveal_mines)
+
+    def _patch(self, cells, reveal_mines=False):
+        """Recomputes the glyphs of 'cells' (unique flat indices) and the rows they are in."""
+        revealed, flagged, mine, value = self._cell_state(cells)
+        hidden = np.where(flagged, "F ", "# ")
+        if reveal_mines:
+            hidden = np.where(~flagged & mine, "* ", hidden)
+        new_glyphs = np.where(revealed, VALUE_GLYPHS[value + 1], hidden)
+
+        flat = self.glyphs.reshape(-1)
+        changed = flat[cells] != new_glyphs
+        cells = cells[changed]
+        flat[cells] = new_glyphs[changed]
+
+        for r in np.unique(cells // self.game.cols):
+            self.lines[r] = self._label(r) + "".join(self.glyphs[r])
+        if self.ansi:
+            self.pending = np.concatenate((self.pending, cells))
+
+    def draw(self, reveal_mines=False):
+        """Brings the buffer up to date and writes one frame."""
+        self.update(reveal_mines)
+
+        if not self.ansi or not self.drawn:
+            frame = self.header + "\n" + "\n".join(self.lines) + "\n\n"
+            if self.ansi:
+                frame = CLEAR_SCREEN + frame
+                self.drawn = True
+        else:
+            # The header is on line 2, board row r on line r + 3, and cell c
+            # starts after the row label and its space, at column 2*c + label_width + 2
+            parts = [move_cursor(r + 3, 2 * c + self.label_width + 2) + self.glyphs[r, c]
+                     for r, c in zip(*np.divmod(self.pending, self.game.cols))]
+            # Park the cursor under the board and clear the old messages there
+            parts.append(move_cursor(self.game.rows + 4, 1) + CLEAR_BELOW)
+            frame = "".join(parts)
+        self.pending = np.zeros(0, dtype=np.int64)
+
+        self.out.write(frame)
+        self.out.flush()
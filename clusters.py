@@ -0,0 +1,126 @@
+# clusters.py
+
+# This module labels 8-connected components on boolean board masks
+# (mine clusters, zero regions, ...) with an array-backed union-find.
+
+
+import numpy as np
+
+# Offsets into the next row. Horizontal runs are merged up front, so linking
+# every cell to these 3 offsets covers all 8 directions.
+_DOWN_OFFSETS = ((1, -1), (1, 0), (1, 1))
+
+
+def offset_windows(rows, cols, dr, dc):
+    """
+    Index tuples (src, dst) such that grid[dst] is the neighbor at offset
+    (dr, dc) of every cell in grid[src], for grids shaped (..., rows, cols).
+    """
+    src_r = slice(max(-dr, 0), rows - max(dr, 0))
+    dst_r = slice(max(dr, 0), rows - max(-dr, 0))
+    src_c = slice(max(-dc, 0), cols - max(dc, 0))
+    dst_c = slice(max(dc, 0), cols - max(-dc, 0))
+    return (..., src_r, src_c), (..., dst_r, dst_c)
+
+
+def _run_edges(mask, run):
+    """
+    Pairs (u, v) of run ids linking 8-adjacent True cells in consecutive rows.
+    'mask' is a (rows, cols) board or a (num_boards, rows, cols) batch;
+    edges never cross from one board to another. 'run' holds the run id of
+    every True cell. Repeats of the same pair are dropped, so long runs lying
+    side by side add one edge instead of one per cell.
+    """
+    rows, cols = mask.shape[-2:]
+    run = run.reshape(mask.shape)
+    us, vs = [], []
+    for dr, dc in _DOWN_OFFSETS:
+        src, dst = offset_windows(rows, cols, dr, dc)
+        linked = mask[src] & mask[dst]
+        u, v = run[src][linked], run[dst][linked]
+        if u.size:
+            # Cells are visited in raster order, so equal pairs are adjacent
+            new = np.ones(u.size, dtype=bool)
+            new[1:] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+            u, v = u[new], v[new]
+        us.append(u)
+        vs.append(v)
+    return np.concatenate(us), np.concatenate(vs)
+
+
+def label_components(mask):
+    """
+    Union-find over the flat cell indices of 'mask' (single board or batch).
+    Returns an int array with the shape of 'mask': every True cell holds the
+    flat index of its component's root (the smallest index in the component),
+    every False cell holds -1.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    cols = mask.shape[-1]
+    flat = mask.ravel()
+    cells = np.flatnonzero(flat)
+    # Work on compact ids 0..n-1 of the True cells only; the mapping keeps
+    # the ordering, so the smallest compact id is also the smallest flat index
+    dtype = np.int32 if mask.size < 2**31 else np.int64
+    ids = np.arange(cells.size, dtype=dtype)
+
+    # Scanline pass: every horizontal run of True cells starts out as one set,
+    # rooted at its leftmost cell
+    left = np.zeros_like(flat)
+    left[1:] = flat[:-1]
+    left[::cols] = False # the first cell of a row has no left neighbor
+    run_start = (flat & ~left)[cells]
+    parent = np.maximum.accumulate(np.where(run_start, ids, 0))
+
+    run = np.full(mask.size, -1, dtype=dtype)
+    run[cells] = parent
+    u, v = _run_edges(mask, run)
+
+    while True:
+        # Pointer jumping until every cell points straight at its root
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+        root_u, root_v = parent[u], parent[v]
+        pending = root_u != root_v
+        if not pending.any():
+            break
+        # Hook the larger root under the smaller one. Edges already inside
+        # one component stay that way, so they are dropped for later rounds.
+        u, v = u[pending], v[pending]
+        root_u, root_v = root_u[pending], root_v[pending]
+        np.minimum.at(parent, np.maximum(root_u, root_v), np.minimum(root_u, root_v))
+
+    labels = np.full(mask.shape, -1, dtype=np.int64)
+    labels.ravel()[cells] = cells[parent]
+    return labels
+
+
+def count_clusters(mask):
+    """Number of 8-connected clusters of True cells on a single (rows, cols) board."""
+    labels = label_components(mask)
+    roots = np.arange(labels.size).reshape(labels.shape)
+    return int(np.count_nonzero(labels == roots))
+
+
+def cluster_stats_batch(mines):
+    """
+    Cluster statistics for a whole (num_boards, rows, cols) batch in one call.
+    Returns (cluster_counts, size_hist):
+      - cluster_counts[i] is the number of mine clusters on board i
+      - size_hist[s] is how many clusters of exactly 's' mines the batch contains
+    """
+    mines = np.asarray(mines, dtype=bool)
+    num_boards = mines.shape[0]
+    board_cells = mines[0].size if num_boards else 0
+
+    labels = label_components(mines).ravel()
+    roots = np.flatnonzero(labels == np.arange(labels.size))
+
+    cluster_counts = np.bincount(roots // max(board_cells, 1), minlength=num_boards)
+    sizes = np.bincount(labels[labels >= 0], minlength=labels.size)[roots]
+    size_hist = np.bincount(sizes, minlength=1)
+    return cluster_counts, size_hist
@@ -0,0 +1,243 @@
+# compact_minesweeper.py
+
+# This file contains 'CompactMinesweeper', an array-backed drop-in alternative to
+# the 'Minesweeper' engine for very large boards (e.g. 1000x1000 stress tests).
+
+
+from functools import lru_cache
+import numpy as np
+from board_render import VALUE_GLYPHS
+from clusters import label_components, offset_windows
+from minesweeper_game import board_values, generate_boards, preset_config
+
+# Row/col offsets of the 8 neighbors, in the same order as Minesweeper.neighbors
+_OFFSETS = [(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if (dr, dc) != (0, 0)]
+
+
+@lru_cache(maxsize=8)
+def neighbor_table(rows, cols):
+    """
+    (rows*cols, 8) int32 table of flat neighbor indices (r*cols + c), -1 outside the board.
+    Computed once per board shape and shared by all games of that shape.
+    """
+    index = np.arange(rows * cols, dtype=np.int32)
+    r, c = index // cols, index % cols
+    table = np.full((rows * cols, 8), -1, dtype=np.int32)
+    for k, (dr, dc) in enumerate(_OFFSETS):
+        nr, nc = r + dr, c + dc
+        inside = (nr >= 0) & (nr < rows) & (nc >= 0) & (nc < cols)
+        table[inside, k] = nr[inside] * cols + nc[inside]
+    table.flags.writeable = False # shared between games
+    return table
+
+
+class CompactMinesweeper:
+    """
+    Minesweeper engine with the same public methods as 'Minesweeper', but the
+    state lives in flat uint8/int8 NumPy arrays indexed by r*cols + c instead
+    of sets of (r, c) tuples, so moves allocate next to nothing.
+    """
+
+    def __init__(self, difficulty=None, rows=None, cols=None, nBombs=None, seed=None, rng=None):
+
+        if rows is not None and cols is not None and nBombs is not None:
+            self.rows, self.cols, self.nBombs = rows, cols, nBombs
+        else:
+            self.rows, self.cols, self.nBombs = preset_config(difficulty)
+
+        n_cells = self.rows * self.cols
+        self.table = neighbor_table(self.rows, self.cols)
+        # Game state, one byte per cell
+        self.mine_mask = np.zeros(n_cells, dtype=np.uint8)
+        self.revealed_mask = np.zeros(n_cells, dtype=np.uint8)
+        self.flag_mask = np.zeros(n_cells, dtype=np.uint8)
+        self.revealed_count = 0
+        # Same meaning as Minesweeper.values (-1 = mine, 0-8 = count); 'flat_values'
+        # is a flat view of the same memory
+        self.values = np.zeros((self.rows, self.cols), dtype=np.int8)
+        self.flat_values = self.values.reshape(-1)
+        self.first_click = False # Flag to track if the timer should start
+        # Flat indices (ints or arrays) changed since the last take_changes()
+        self.changes = []
+        # Random source for mine placement: a numpy Generator, or one created from 'seed'
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+        # Zero regions, filled in by place_mines (see index_zero_regions)
+        self.region_of = np.full(n_cells, -1, dtype=np.int64)
+        self.region_roots = self.region_cells = np.zeros(0, dtype=np.int64)
+        self.border_roots = self.border_cells = np.zeros(0, dtype=np.int64)
+
+    # --- Set views, for code written against Minesweeper's attributes ---
+
+    def _cells(self, mask):
+        return {divmod(int(i), self.cols) for i in np.flatnonzero(mask)}
+
+    @property
+    def mines(self):
+        return self._cells(self.mine_mask)
+
+    @property
+    def revealed(self):
+        return self._cells(self.revealed_mask)
+
+    @property
+    def flags(self):
+        return self._cells(self.flag_mask)
+
+    # --- Same public methods as Minesweeper ---
+
+    def inside(self, r, c):
+        """Helper function to check if a coordinate is within the board bounds."""
+        return 0 <= r < self.rows and 0 <= c < self.cols
+
+    def neighbors(self, r, c):
+        """Yield 8-connected neighbors for a given cell (r, c)."""
+        for i in self.table[r * self.cols + c]:
+            if i >= 0:
+                yield divmod(int(i), self.cols)
+
+    def place_mines(self, safe=None, rng=None):
+        """
+        Place mines on the board, with the same 'safe' rule and random stream
+        as Minesweeper.place_mines (same seed, same layout).
+        Uses the batch generator with a batch of one board.
+        """
+        mines, _ = generate_boards(self.rows, self.cols, self.nBombs, 1, safe=safe,
+                                   rng=rng if rng is not None else self.rng)
+        self.set_mines(mines[0])
+
+    def set_mines(self, mines):
+        """
+        Use a given mine layout instead of a random one (e.g. to replay a game).
+        'mines' is a boolean (rows, cols) mask.
+        """
+        mines = np.asarray(mines, dtype=bool).reshape(self.rows, self.cols)
+        self.mine_mask[:] = mines.reshape(-1)
+        self.values[:] = board_values(mines)
+        self.index_zero_regions()
+
+    def index_zero_regions(self):
+        """
+        Labels the 8-connected regions of zero cells once per board, so that
+        revealing a zero can open its whole region in one array operation.
+        Regions are named by their root cell (see clusters.label_components);
+        region_cells/border_cells list the zero cells/numbered border cells of
+        every region, sorted by root, so a region's cells are one slice.
+        """
+        n_cells = self.rows * self.cols
+        zero = self.values == 0
+        labels = label_components(zero)
+        self.region_of = labels.reshape(-1)
+
+        zero_cells = np.flatnonzero(zero)
+        roots = self.region_of[zero_cells]
+        order = np.argsort(roots)
+        self.region_roots, self.region_cells = roots[order], zero_cells[order]
+
+        # (root, cell) pairs of numbered cells next to a region, encoded as root*n + cell
+        index = np.arange(n_cells).reshape(self.rows, self.cols)
+        numbered = self.values > 0
+        keys = []
+        for dr, dc in _OFFSETS:
+            src, dst = offset_windows(self.rows, self.cols, dr, dc)
+            linked = zero[src] & numbered[dst]
+            keys.append(labels[src][linked] * n_cells + index[dst][linked])
+        keys = np.unique(np.concatenate(keys))
+        self.border_roots, self.border_cells = keys // n_cells, keys % n_cells
+
+    def _open_region(self, i):
+        """
+        Fast path for revealing zero cell 'i': reveals its labeled region plus
+        the numbered border at once, in time proportional to their size.
+        Returns False (and changes nothing) when flags or earlier reveals touch
+        the region, as the plain BFS then reveals a different set of cells.
+        """
+        root = self.region_of[i]
+        lo, hi = np.searchsorted(self.region_roots, (root, root + 1))
+        zeros = self.region_cells[lo:hi]
+        lo, hi = np.searchsorted(self.border_roots, (root, root + 1))
+        border = self.border_cells[lo:hi]
+        if self.revealed_mask[zeros].any() or self.flag_mask[zeros].any() or self.flag_mask[border].any():
+            return False
+
+        border = border[self.revealed_mask[border] == 0]
+        self.revealed_mask[zeros] = 1
+        self.revealed_mask[border] = 1
+        self.revealed_count += zeros.size + border.size
+        self.changes += [zeros, border]
+        return True
+
+    def reveal(self, r, c):
+        """
+        Reveal a cell. Returns True if a mine was hit (loss), False otherwise.
+        A zero cell opens its precomputed zero region (see index_zero_regions)
+        in one step; if flags get in the way, zero cells are flood-filled one BFS
+        level at a time over the neighbor table instead. A cell is marked
+        revealed when it is queued, so it is never queued twice.
+        """
+        i = r * self.cols + c
+        if self.flag_mask[i]:
+            # Cannot reveal a flagged cell
+            return False
+
+        if self.mine_mask[i]:
+            if not self.revealed_mask[i]:
+                self.revealed_mask[i] = 1
+                self.revealed_count += 1
+                self.changes.append(i)
+            return True  # B-O-O-M! Hit a mine.
+
+        if self.revealed_mask[i]:
+            return False
+        if self.region_of[i] >= 0 and self._open_region(i):
+            return False
+        self.revealed_mask[i] = 1
+        self.revealed_count += 1
+        self.changes.append(i)
+
+        frontier = np.array([i], dtype=np.int32)
+        while True:
+            # Only zero cells open up their neighbors
+            frontier = frontier[self.flat_values[frontier] == 0]
+            if frontier.size == 0:
+                break
+            candidates = self.table[frontier].ravel()
+            candidates = candidates[candidates >= 0]
+            candidates = candidates[(self.revealed_mask[candidates] | self.flag_mask[candidates]) == 0]
+            frontier = np.unique(candidates)
+            self.revealed_mask[frontier] = 1
+            self.revealed_count += frontier.size
+            self.changes.append(frontier)
+        return False # No mine hit
+
+    def toggle_flag(self, r, c):
+        """Flag or unflag a cell. Cannot flag a revealed cell."""
+        i = r * self.cols + c
+        if self.revealed_mask[i]:
+            return # Don't allow flagging a revealed cell
+        self.flag_mask[i] ^= 1
+        self.changes.append(i)
+
+    def take_changes(self):
+        """Flat indices (r*cols + c) of the cells changed since the last call."""
+        changed = np.concatenate([np.atleast_1d(c) for c in self.changes]) if self.changes else np.zeros(0, dtype=np.int64)
+        self.changes = []
+        return changed.astype(np.int64, copy=False)
+
+    def won(self):
+        """Win condition: all non-mine cells are revealed."""
+        return self.revealed_count == self.rows * self.cols - self.nBombs
+
+    def display(self, reveal_mines=False):
+        """Textual board display, identical to Minesweeper.display."""
+        hidden = np.where(self.flag_mask == 1, "F ", "# ")
+        if reveal_mines:
+            hidden = np.where((self.flag_mask == 0) & (self.mine_mask == 1), "* ", hidden)
+        glyphs = np.where(self.revealed_mask == 1, VALUE_GLYPHS[self.flat_values + 1], hidden)
+        glyphs = glyphs.reshape(self.rows, self.cols)
+
+        width = max(2, len(str(self.rows - 1)))
+        lines = ["\n" + " " * (width + 1) + " ".join(f"{i:2d}" for i in range(self.cols))]
+        for r in range(self.rows):
+            lines.append(f"{r:{width}d} " + "".join(glyphs[r]))
+        print("\n".join(lines))
+        print()
@@ -1,57 +1,369 @@
 # highscores.py
 
-# This module handles all highscores (reading/writing to JSONfile).
+# This module handles all highscores: reading and writing them through the
+# configured backend, a JSON file (default) or an SQLite database.
 
 import json
 import os
+import sqlite3
+import time
+from bisect import bisect_right
+from contextlib import contextmanager
 
 # This constant is now defined the module that uses it.
 HIGHSCORES_FILE = "minesweeper_highscores.json"
+# SQLite database used instead when the backend is "sqlite"
+HIGHSCORES_DB = "minesweeper_highscores.db"
+# "json" (default) or "sqlite"; the SQLite backend is safe for several sessions
+# saving scores at the same time
+HIGHSCORES_BACKEND = os.environ.get("MINESWEEPER_HIGHSCORES_BACKEND", "json")
+# Scores kept per board configuration
+TOP_N = 10
+
+
+def config_key(rows, cols, nBombs):
+    """The key that uniquely identifies a board configuration, e.g. '9x9x10'."""
+    return f"{rows}x{cols}x{nBombs}"
+
+
+def make_entry(name, elapsed_time, bbbv=None, replay=None):
+    """
+    A score entry: name and time (2 decimals), plus the 3BV of the board and
+    the byte offset of the game's record in the replay archive when known.
+    """
+    entry = {"name": name, "time": round(elapsed_time, 2)}
+    if bbbv is not None:
+        entry["3bv"] = int(bbbv)
+    if replay is not None:
+        entry["replay"] = int(replay)
+    return entry
+
+
+class HighscoreStore:
+    """
+    Highscores of one JSON file, cached in memory.
+    The file is only parsed again when its modification time or size changed
+    (e.g. another session saved a score). Every configuration's list stays
+    sorted by time, so a new score is placed with a binary search, and the
+    file is replaced atomically (temp file + os.replace) on every save.
+    """
+
+    def __init__(self, path=HIGHSCORES_FILE, top_n=TOP_N):
+        self.path = path
+        self.top_n = top_n
+        self.data = {} # config key -> score entries, fastest first
+        self.times = {} # config key -> the entries' times, for bisect
+        self.loaded = False
+        self.stamp = None # (mtime_ns, size) of the file when it was last read or written
+        self.deferred = 0 # Nesting depth of batch()
+        self.dirty = False # Changes not written yet because of batch()
+
+    # --- Reading ---
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def refresh(self):
+        """Re-reads the file if it changed on disk since the last read or write."""
+        if self.dirty:
+            return # Unsaved changes in a batch take precedence
+        stamp = self._file_stamp()
+        if self.loaded and stamp == self.stamp:
+            return
+        self.loaded = True
+        self.stamp = stamp
+        self._set_data(self._read() if stamp is not None else {})
+
+    def _read(self):
+        """Parses the file; a corrupt file is moved aside instead of silently dropped."""
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("top level is not an object")
+            return data
+        except ValueError as error:
+            backup = f"{self.path}.corrupt-{time.strftime('%Y%m%d-%H%M%S')}"
+            try:
+                os.replace(self.path, backup)
+            except FileNotFoundError:
+                pass # Another session moved it first
+            self.stamp = None
+            print(f"Warning: highscores file was unreadable ({error}); moved it to {backup}.")
+            return {}
+
+    def _set_data(self, data):
+        self.data = {key: sorted(scores, key=lambda x: x["time"]) for key, scores in data.items()}
+        self.times = {key: [entry["time"] for entry in scores] for key, scores in self.data.items()}
+
+    def scores(self, rows, cols, nBombs):
+        """The top scores of a configuration, fastest first."""
+        self.refresh()
+        return list(self.data.get(config_key(rows, cols, nBombs), []))
+
+    def all_scores(self):
+        """{config key: top scores} for every configuration."""
+        self.refresh()
+        return {key: list(scores) for key, scores in self.data.items()}
+
+    def qualifies(self, rows, cols, nBombs, elapsed_time):
+        """Checks if a given time is fast enough to make the top N."""
+        self.refresh()
+        times = self.times.get(config_key(rows, cols, nBombs), [])
+        # Fewer than N scores: any win qualifies; otherwise beat the slowest one
+        return len(times) < self.top_n or elapsed_time < times[-1]
+
+    # --- Writing ---
+
+    def add(self, rows, cols, nBombs, name, elapsed_time, bbbv=None, replay=None):
+        """Inserts a score, keeps the top N and saves. Returns the configuration's list."""
+        self.refresh()
+        key = config_key(rows, cols, nBombs)
+        entry = make_entry(name, elapsed_time, bbbv, replay)
+
+        scores = self.data.setdefault(key, [])
+        times = self.times.setdefault(key, [])
+        # After any equal times, like the stable sort it replaces
+        i = bisect_right(times, entry["time"])
+        if i >= self.top_n:
+            return list(scores) # Too slow to enter, nothing changes
+        scores.insert(i, entry)
+        times.insert(i, entry["time"])
+        del scores[self.top_n:], times[self.top_n:]
+
+        self.dirty = True
+        self.flush()
+        return list(scores)
+
+    def replace_all(self, data):
+        """Replaces every list with 'data' (config key -> entries) and saves."""
+        self._set_data(data)
+        self.dirty = True
+        self.flush()
+
+    def flush(self):
+        """Writes pending changes, unless a batch() is still open."""
+        if self.deferred or not self.dirty:
+            return
+        # Write to a temp file and rename, so a crash never leaves a truncated file
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self.stamp = self._file_stamp()
+        self.dirty = False
+
+    @contextmanager
+    def batch(self):
+        """Groups several add() calls into a single write of the file."""
+        self.deferred += 1
+        try:
+            yield self
+        finally:
+            self.deferred -= 1
+            self.flush()
+
+
+class SQLiteHighscoreStore:
+    """
+    Same methods as HighscoreStore, backed by an SQLite database so that many
+    sessions on one host can save scores at once without losing any.
+    Every insert is its own IMMEDIATE transaction (writers queue up on the
+    database lock instead of overwriting each other), the database runs in
+    WAL mode so readers never block writers, and top-N queries are answered
+    from the (config_key, time) index. All scores are kept; only the top N
+    of a configuration are ever read.
+    """
+
+    def __init__(self, path=HIGHSCORES_DB, top_n=TOP_N, json_path=HIGHSCORES_FILE):
+        self.path = path
+        self.top_n = top_n
+        self.json_path = json_path # Migrated once into a new database, if it exists
+        self.conn = None
+        self.pid = None
+        self.deferred = 0 # Nesting depth of batch()
+
+    def _connect(self):
+        """The connection of this process (a connection must not cross a fork)."""
+        if self.conn is None or self.pid != os.getpid():
+            # isolation_level=None: transactions are opened explicitly below
+            self.conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            self.pid = os.getpid()
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            with self._transaction():
+                self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS scores (
+                        id INTEGER PRIMARY KEY,
+                        config_key TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        time REAL NOT NULL,
+                        bbbv INTEGER,
+                        replay INTEGER
+                    )""")
+                # Databases created before replay offsets were stored lack the column
+                columns = [row[1] for row in self.conn.execute("PRAGMA table_info(scores)")]
+                if "replay" not in columns:
+                    self.conn.execute("ALTER TABLE scores ADD COLUMN replay INTEGER")
+                # 'id' breaks ties in insertion order, like the JSON store
+                self.conn.execute("CREATE INDEX IF NOT EXISTS scores_by_time ON scores (config_key, time, id)")
+                self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+                self._migrate_json()
+        return self.conn
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT, or nothing extra inside a batch()."""
+        if self.conn.in_transaction:
+            yield
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _migrate_json(self):
+        """One-shot import of the JSON highscores file (runs inside the schema transaction)."""
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+        count = 0
+        if self.json_path and os.path.exists(self.json_path):
+            data = HighscoreStore(self.json_path, top_n=self.top_n).all_scores()
+            for key, scores in data.items():
+                self._insert_many(key, scores)
+                count += len(scores)
+        self.conn.execute("INSERT INTO meta VALUES ('json_migrated', ?)", (str(count),))
+        if count:
+            print(f"Imported {count} highscores from {self.json_path} into {self.path}.")
+
+    def _insert_many(self, key, scores):
+        self.conn.executemany("INSERT INTO scores (config_key, name, time, bbbv, replay) VALUES (?, ?, ?, ?, ?)",
+                              [(key, e["name"], e["time"], e.get("3bv"), e.get("replay")) for e in scores])
+
+    def _top(self, key):
+        rows = self._connect().execute(
+            "SELECT name, time, bbbv, replay FROM scores WHERE config_key = ? ORDER BY time, id LIMIT ?",
+            (key, self.top_n)).fetchall()
+        return [make_entry(*row) for row in rows]
+
+    def refresh(self):
+        """Nothing is cached, every query reads the database."""
+
+    def scores(self, rows, cols, nBombs):
+        """The top scores of a configuration, fastest first."""
+        return self._top(config_key(rows, cols, nBombs))
+
+    def all_scores(self):
+        """{config key: top scores} for every configuration."""
+        keys = self._connect().execute("SELECT DISTINCT config_key FROM scores ORDER BY config_key").fetchall()
+        return {key: self._top(key) for (key,) in keys}
+
+    def qualifies(self, rows, cols, nBombs, elapsed_time):
+        """Checks if a given time is fast enough to make the top N."""
+        # Time of the N-th best score, if there are N scores yet
+        slowest = self._connect().execute(
+            "SELECT time FROM scores WHERE config_key = ? ORDER BY time, id LIMIT 1 OFFSET ?",
+            (config_key(rows, cols, nBombs), self.top_n - 1)).fetchone()
+        return slowest is None or elapsed_time < slowest[0]
+
+    def add(self, rows, cols, nBombs, name, elapsed_time, bbbv=None, replay=None):
+        """Inserts a score in its own transaction. Returns the configuration's top N."""
+        key = config_key(rows, cols, nBombs)
+        entry = make_entry(name, elapsed_time, bbbv, replay)
+        self._connect()
+        with self._transaction():
+            self._insert_many(key, [entry])
+        return self._top(key)
+
+    def replace_all(self, data):
+        """Replaces every score with 'data' (config key -> entries)."""
+        self._connect()
+        with self._transaction():
+            self.conn.execute("DELETE FROM scores")
+            for key, scores in data.items():
+                self._insert_many(key, scores)
+
+    @contextmanager
+    def batch(self):
+        """Runs several add() calls in one transaction."""
+        self._connect()
+        with self._transaction():
+            yield self
+
+    def close(self):
+        if self.conn is not None and self.pid == os.getpid():
+            self.conn.close()
+        self.conn = None
+
+
+def migrate_json_to_sqlite(json_path=HIGHSCORES_FILE, db_path=HIGHSCORES_DB):
+    """
+    Copies the scores of a JSON highscores file into an SQLite database.
+    This happens automatically when a database is first created, and only
+    once per database. Returns the database's top scores afterwards.
+    """
+    store = SQLiteHighscoreStore(db_path, json_path=json_path)
+    try:
+        return store.all_scores()
+    finally:
+        store.close()
+
+
+_stores = {}
+
+def get_store(path=None, backend=None):
+    """
+    The shared store of a highscores file: HIGHSCORES_FILE or HIGHSCORES_DB
+    by default, depending on 'backend' (HIGHSCORES_BACKEND by default).
+    """
+    backend = backend or HIGHSCORES_BACKEND
+    if backend == "sqlite":
+        path = path or HIGHSCORES_DB
+        factory = SQLiteHighscoreStore
+    elif backend == "json":
+        path = path or HIGHSCORES_FILE
+        factory = HighscoreStore
+    else:
+        raise ValueError(f"Unknown highscores backend: {backend}")
+    if (backend, path) not in _stores:
+        _stores[(backend, path)] = factory(path)
+    return _stores[(backend, path)]
+
 
 def load_highscores():
     """
-    Load highscores JSON from disk.
-    The data structure is a dictionary, e.g.:
-    { 
+    Loads the top scores of every configuration from the current backend
+    (see get_store). The data structure is a dictionary, e.g.:
+    {
       "9x9x10": [{"name": "Alice", "time": 12.34}, ...],
       "16x16x40": [...]
     }
     """
-    if os.path.exists(HIGHSCORES_FILE):
-        try:
-            with open(HIGHSCORES_FILE, "r") as f:
-                return json.load(f)
-        except Exception:
-            # If file is corupted, return an empty structure
-            return {}
-    return {}
+    return get_store().all_scores()
 
 
 def save_highscores(data):
-    """Saves the highscores data (dictionary) back to the JSON file."""
-    with open(HIGHSCORES_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    """Replaces every stored score with the highscores data (dictionary), in the current backend."""
+    get_store().replace_all(data)
 
 
-def update_highscores_config(rows, cols, nBombs, name, elapsed_time):
+def update_highscores_config(rows, cols, nBombs, name, elapsed_time, bbbv=None, replay=None):
     """
-    Inserts a new score into the highscore list for a specific configuration.
-    This function reads, updates, sorts, truncates (top 10), and saves.
+    Inserts a new score for a specific configuration in the current backend
+    and returns the configuration's top N afterwards. The JSON backend only
+    keeps the top N; the SQLite backend keeps every score and reads the top N.
+    'bbbv' is the 3BV of the board that was cleared (see board_metrics.bbbv), if known.
+    'replay' is the offset of the game in the replay archive (see replay.append_replay),
+    so replay.verify_highscore can check the score.
     """
-    data = load_highscores()
-    
-    # The key uniquely identifies the board configuration
-    key = f"{rows}x{cols}x{nBombs}"
-    scores = data.get(key, [])
-    
-    scores.append({"name": name, "time": round(elapsed_time, 2)})
-    
-    # Sort the list of scores by time (ascending) and keep only the top 10
-    scores = sorted(scores, key=lambda x: x["time"])[:10]
-    
-    data[key] = scores
-    save_highscores(data)
-    return scores
+    return get_store().add(rows, cols, nBombs, name, elapsed_time, bbbv=bbbv, replay=replay)
 
 
 def qualifies_for_top10(rows, cols, nBombs, elapsed_time):
@@ -59,31 +371,25 @@ def qualifies_for_top10(rows, cols, nBombs, elapsed_time):
     Checks if a given time is fast enough to make the top 10.
     This avoids asking for a name if the player didn't win fast enough.
     """
-    data = load_highscores()
-    key = f"{rows}x{cols}x{nBombs}"
-    scores = data.get(key, [])
-    
-    if len(scores) < 10:
-        # If there are fewer than 10 scores, any win qualifies
-        return True
-        
-    # Check if the new time is faster than the slowest time in the top 10
-    # The slowest time is the last one in the sorted list.
-    return elapsed_time < scores[-1]["time"]
+    return get_store().qualifies(rows, cols, nBombs, elapsed_time)
 
 
 def print_highscores_for_config(rows, cols, nBombs):
     """Pretty-prints the highscore table for a specific configuration."""
-    data = load_highscores()
-    key = f"{rows}x{cols}x{nBombs}"
-    scores = data.get(key, [])
-    
+    key = config_key(rows, cols, nBombs)
+    scores = get_store().scores(rows, cols, nBombs)
+
     if not scores:
         print(f"No highscores recorded yet for {key}.")
         return
-        
+
     print(f"\nTop {len(scores)} highscores for {key}:")
-   
+
     for i, score_entry in enumerate(scores, 1):
-        print(f"{i}. {score_entry['name']} — {score_entry['time']:.2f} seconds")
-    print()
\ No newline at end of file
+        line = f"{i}. {score_entry['name']} — {score_entry['time']:.2f} seconds"
+        if "3bv" in score_entry:
+            # Older entries have no 3BV; 3BV/s compares times across boards of the same size
+            rate = score_entry["3bv"] / score_entry["time"] if score_entry["time"] > 0 else 0.0
+            line += f" (3BV {score_entry['3bv']}, {rate:.2f} 3BV/s)"
+        print(line)
+    print()
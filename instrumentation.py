@@ -0,0 +1,96 @@
+# instrumentation.py
+
+# This module times the stages of a run (board generation, each statistic,
+# plotting, ...) so a slow analytics run shows where its time goes.
+
+
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+
+class StageTimer:
+    """
+    Accumulates wall time and processed items per named stage.
+    Timers filled in worker processes are sent back and merged, like
+    RunningStats. A disabled timer ignores stage() calls, so instrumented
+    code costs nothing extra when profiling is off.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.seconds = {} # stage -> total seconds
+        self.items = {} # stage -> boards/moves/... processed
+        self.calls = {} # stage -> number of timed calls
+        self.units = {} # stage -> what its items are ("boards", "games", ...)
+
+    @contextmanager
+    def stage(self, name, items=0, unit="boards"):
+        """Times the enclosed block as one call of stage 'name' that processed 'items' 'unit'."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started, items, unit)
+
+    def add(self, name, seconds, items=0, unit="boards"):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.items[name] = self.items.get(name, 0) + items
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.units[name] = unit
+
+    def merge(self, other):
+        """Folds another timer's totals into this one (in place)."""
+        for name, seconds in other.seconds.items():
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.items[name] = self.items.get(name, 0) + other.items[name]
+            self.calls[name] = self.calls.get(name, 0) + other.calls[name]
+            self.units[name] = other.units[name]
+
+    def summary(self, wall_time=None):
+        """
+        {stage: {"seconds", "calls", "items", "unit", "items_per_sec", "share"}} in the
+        order stages were first timed. 'share' is the fraction of 'wall_time'
+        (default: the sum over all stages); stages run in worker processes can
+        add up to more than the wall time.
+        """
+        total = wall_time if wall_time else sum(self.seconds.values())
+        return {
+            name: {
+                "seconds": seconds,
+                "calls": self.calls[name],
+                "items": self.items[name],
+                "unit": self.units[name],
+                "items_per_sec": self.items[name] / seconds if seconds > 0 else 0.0,
+                "share": seconds / total if total else 0.0,
+            }
+            for name, seconds in self.seconds.items()
+        }
+
+    def print_summary(self, wall_time=None):
+        """One line per stage: time, share and throughput."""
+        print(f"\nStage timings{f' (wall time {wall_time:.2f}s)' if wall_time else ''}:")
+        for name, row in self.summary(wall_time).items():
+            rate = f"{row['items_per_sec']:14,.0f} {row['unit']}/sec" if row["items"] else ""
+            print(f"  {name:26s} {row['seconds']:8.3f}s {100 * row['share']:6.1f}%  {rate}")
+
+
+def instrument_game(game, timer, methods=("place_mines", "reveal", "toggle_flag")):
+    """
+    Wraps the given methods of one game instance (Minesweeper or
+    CompactMinesweeper) so every call is timed as stage 'Class.method'.
+    Only this instance is affected; the classes stay untouched.
+    """
+    for name in methods:
+        method = getattr(game, name)
+        stage = f"{type(game).__name__}.{name}"
+
+        def timed(*args, _method=method, _stage=stage, **kwargs):
+            with timer.stage(_stage, items=1, unit="calls"):
+                return _method(*args, **kwargs)
+
+        setattr(game, name, wraps(method)(timed))
+    return game
@@ -4,38 +4,76 @@
 # It handles the user interface CLI menu and the main game loop.
 # It imports all the components from our other modules.2
 
+import argparse
+import os
+import sys
 import time
-from minesweeper_game import Minesweeper
+import benchmarks
+import highscores
+import replay
+from minesweeper_game import PRESETS, Minesweeper, preset_config
+from compact_minesweeper import CompactMinesweeper
+from board_render import BoardRenderer
 from highscores import print_highscores_for_config, qualifies_for_top10, update_highscores_config
-from analytics import analytics_mode
+from analytics import FIRST_CLICK_POLICIES, analytics_mode
+from sweep import parse_values, sweep_mode
+from probability import mine_probabilities
+from board_metrics import bbbv
+from replay import ABANDONED, FLAG, LOST, REVEAL, WON, Replay, append_replay
 
 # -----------------------
 # Gameplay mode
 # -----------------------
 
-def play_game_with_config(rows, cols, nBombs):
-    """Play a text-based game with explicit configuration."""
-    
+# Boards with at least this many cells use the array-backed engine
+COMPACT_ENGINE_CELLS = 10_000
 
-    current_game = Minesweeper(rows=rows, cols=cols, nBombs=nBombs)
-    
-    # Show highscores for this config before starting
+def play_game_with_config(rows, cols, nBombs, engine=None, seed=None):
+    """
+    Play a text-based game with explicit configuration.
+    'engine' is the game class to use (Minesweeper or CompactMinesweeper);
+    by default large boards get CompactMinesweeper. 'seed' fixes the mine layout.
+    """
+    if engine is None:
+        engine = CompactMinesweeper if rows * cols >= COMPACT_ENGINE_CELLS else Minesweeper
+
+    current_game = engine(rows=rows, cols=cols, nBombs=nBombs, seed=seed)
+    # Large boards on a real terminal only redraw the cells that changed
+    # (if the whole board fits on screen; see BoardRenderer.fits_terminal)
+    ansi = sys.stdout.isatty() and rows * cols >= COMPACT_ENGINE_CELLS
+    renderer = BoardRenderer(current_game, ansi=ansi)
+    renderer.draw()
+
+    # Highscores and help go under the first frame, as an ANSI first frame clears the screen
     print_highscores_for_config(rows, cols, nBombs)
 
     print("\nCommands:")
     print("  r row col – reveal")
     print("  f row col – flag/unflag")
+    print("  hint      – show the safest cell to reveal")
     print("  exit      – quit\n")
+    # That text may have scrolled the screen: the next ANSI frame starts over
+    renderer.invalidate()
 
     start_time = None
+    moves = [] # (action, r, c, seconds since the first click), saved as a replay at the end
+    drawn = True
     while True:
-        current_game.display()
+        if not drawn:
+            renderer.draw()
+        drawn = False
         cmd = input(">>> ").lower().strip()
 
         if cmd == "exit":
+            if current_game.first_click:
+                append_replay(Replay.from_game(current_game, moves, ABANDONED, time.time() - start_time))
             print("Exiting game.")
             return
 
+        if cmd == "hint":
+            print_hint(current_game)
+            continue
+
         parts = cmd.split()
         if len(parts) != 3:
             print("Invalid command. Use: r/f row col")
@@ -62,58 +100,71 @@ def play_game_with_config(rows, cols, nBombs):
 
         # --- Game Actions ---
         if action == "r":
-            
+            moves.append((REVEAL, r, c, time.time() - start_time))
             hit_mine = current_game.reveal(r, c)
             
             if hit_mine:
                 # --- Game Over (Loss) ---
-                current_game.display(reveal_mines=True) # Show all mines
+                renderer.draw(reveal_mines=True) # Show all mines
                
                 elapsed_time = time.time() - start_time if start_time else 0.0
+                append_replay(Replay.from_game(current_game, moves, LOST, elapsed_time))
                 print("💥 You clicked a mine! Game Over!")
                 print(f"Time: {elapsed_time:.2f} seconds")
                 return
 
             if current_game.won():
                 # --- Game Over (Win) ---
-                current_game.display()
+                renderer.draw()
                 elapsed_time = time.time() - start_time
+                replay_offset = append_replay(Replay.from_game(current_game, moves, WON, elapsed_time))
+                board_3bv = bbbv(current_game.values)
                 print("🎉 You win!")
-                print(f"Time: {elapsed_time:.2f} seconds")
+                print(f"Time: {elapsed_time:.2f} seconds (3BV {board_3bv}, {board_3bv / max(elapsed_time, 1e-9):.2f} 3BV/s)")
                 
                 # Check highscores
                 if qualifies_for_top10(rows, cols, nBombs, elapsed_time):
                     name = input("You made the top 10! Enter your name: ").strip() or "Anonymous"
-                    update_highscores_config(rows, cols, nBombs, name, elapsed_time)
+                    update_highscores_config(rows, cols, nBombs, name, elapsed_time, bbbv=board_3bv,
+                                             replay=replay_offset)
                     print_highscores_for_config(rows, cols, nBombs)
                 else:
                     print("Not in top 10. Better luck next time!")
                 return
 
         elif action == "f":
+            moves.append((FLAG, r, c, time.time() - start_time))
             current_game.toggle_flag(r, c)
 
         else:
             print("Unknown command. Use 'r' or 'f'.")
 
 
+def print_hint(game):
+    """Prints the unflagged hidden cell least likely to be a mine, with its probability."""
+    if not game.first_click:
+        print("Hint: the first click is always safe.")
+        return
+
+    # Flags are the player's guesses and may be wrong, so they are not trusted here
+    probabilities = mine_probabilities(game)
+    flags = game.flags
+    candidates = sorted(cell for cell in probabilities if cell not in flags)
+    if not candidates:
+        print("Hint: no unflagged cells left to reveal.")
+        return
+    r, c = min(candidates, key=probabilities.get)
+    print(f"Hint: reveal {r} {c} (mine probability {100 * probabilities[(r, c)]:.1f}%)")
+
+
 def play_game(difficulty):
     """Play using one of three preset difficulties (0,1,2)."""
-    if difficulty not in (0, 1, 2):
-        difficulty = 1 # Default to Normal
-        
-    if difficulty == 0:
-        rows, cols, mines = 9, 9, 10
-    elif difficulty == 1:
-        rows, cols, mines = 16, 16, 40
-    else:  # difficulty == 2
-         rows, cols, mines = 30, 16, 99
-
+    rows, cols, mines = preset_config(difficulty) # Anything else defaults to Normal
     play_game_with_config(rows, cols, mines)
 
 
 # -----------------------
-# CLI entrypoint
+# Interactive menu
 # -----------------------
 def input_int(prompt, default=None, min_val=None, max_val=None):
     """Utility to prompt for integer input with validation."""
@@ -137,12 +188,13 @@ def input_int(prompt, default=None, min_val=None, max_val=None):
         return default
 
 
-if __name__ == "__main__":
-    # This block is the first thing that runs
+def interactive_menu():
+    """The prompt-driven menu, used when main.py runs without arguments."""
     print("--- Minesweeper ---")
     print("Select mode:")
     print("1 - Play Game")
     print("2 - Analytics Mode")
+    print("3 - Sweep Mode (analytics over many configurations)")
     mode = input("> ").strip()
 
     if mode == "1":
@@ -188,14 +240,7 @@ if __name__ == "__main__":
                 difficulty_input_str = "1"
                 
             difficulty_level = int(difficulty_input_str)
-            
-            if difficulty_level == 0:
-                r, c, m = 9, 9, 10
-            elif difficulty_level == 1:
-                r, c, m = 16, 16, 40
-            else: # 2
-                
-                r, c, m = 30, 16, 99
+            r, c, m = preset_config(difficulty_level)
         else:
             # Custom analytics config
             r = input_int("Rows (e.g., 16): ", default=16, min_val=1)
@@ -206,8 +251,195 @@ if __name__ == "__main__":
 
         
         num_boards_input = input_int("Enter number of boards to generate (e.g., 1000): ", 1000, 1)
+        cpu_count = os.cpu_count() or 1
+        workers_input = input_int(f"Worker processes (1..{cpu_count}, default 1): ", 1, 1, cpu_count)
         
-        analytics_mode(r, c, m, num_boards_input)
+        solver_games_input = input_int("Solver games for the win rate (0 = skip): ", 0, 0)
+        policy_input = input(f"First click ({'/'.join(FIRST_CLICK_POLICIES)}, default none): ").strip().lower() or "none"
+        if policy_input not in FIRST_CLICK_POLICIES:
+            print("Invalid first-click policy. Defaulting to none.")
+            policy_input = "none"
+        output_choice = input("Output: png plots (default), or 'npz' / 'json' data only: ").strip().lower()
+        profile_input = input("Profile the stages? (y/N) ").strip().lower() == "y"
+
+        if output_choice in ("npz", "json"):
+            # Headless run: save the raw results and skip plotting entirely
+            analytics_mode(r, c, m, num_boards_input, workers=workers_input, plots=False,
+                           save_format=output_choice, solver_games=solver_games_input, profile=profile_input,
+                           policy=policy_input)
+        else:
+            analytics_mode(r, c, m, num_boards_input, workers=workers_input, solver_games=solver_games_input,
+                           profile=profile_input, policy=policy_input)
+
+    elif mode == "3":
+        # -- Sweep Mode --
+        print("Enter sweep ranges as single values, lists (9,16,30) or ranges (10-60:10).")
+        try:
+            rows_values = parse_values(input("Rows: ").strip() or "16")
+            cols_values = parse_values(input("Cols: ").strip() or "16")
+            mine_values = parse_values(input("Mines: ").strip() or "10-60:10")
+        except ValueError:
+            print("Invalid range; using 16 x 16 with 10-60 mines.")
+            rows_values, cols_values, mine_values = [16], [16], list(range(10, 61, 10))
+
+        num_boards_input = input_int("Boards per configuration (e.g., 1000): ", 1000, 1)
+        cpu_count = os.cpu_count() or 1
+        workers_input = input_int(f"Worker processes (1..{cpu_count}, default 1): ", 1, 1, cpu_count)
+
+        sweep_mode(rows_values, cols_values, mine_values, num_boards_input, workers=workers_input)
 
     else:
-        print("Unknown mode selected. Exiting.")
\ No newline at end of file
+        print("Unknown mode selected. Exiting.")
+
+
+# -----------------------
+# Command line
+# -----------------------
+# python main.py                      interactive menu
+# python main.py analytics --preset expert --boards 100000 --seed 1 --output-dir out/expert
+# python main.py sweep --mines 10-60:10 --boards 10000 --workers 8 --output-dir out/sweep
+# python main.py play --rows 30 --cols 30 --mines 150
+# python main.py bench --quick
+# python main.py highscores [--preset expert]
+
+def board_config(args, parser, default="normal"):
+    """(rows, cols, mines) from --preset, or from --rows/--cols/--mines (which override the preset)."""
+    rows, cols, mines = PRESETS[args.preset or default]
+    rows = args.rows if args.rows is not None else rows
+    cols = args.cols if args.cols is not None else cols
+    mines = args.mines if args.mines is not None else mines
+    if not 0 < mines < rows * cols:
+        parser.error(f"--mines must be between 1 and {rows * cols - 1} on a {rows}x{cols} board")
+    return rows, cols, mines
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {text}")
+    return value
+
+
+def non_negative_int(text):
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"expected a non-negative integer, got {text}")
+    return value
+
+
+def run_play(args, parser):
+    rows, cols, mines = board_config(args, parser)
+    if mines > rows * cols - 9:
+        parser.error("play needs at least 9 safe cells for the safe first click")
+    highscores.HIGHSCORES_BACKEND = args.highscores_backend or highscores.HIGHSCORES_BACKEND
+    replay.REPLAYS_FILE = args.replays or replay.REPLAYS_FILE
+    play_game_with_config(rows, cols, mines, seed=args.seed)
+    return 0
+
+
+def run_analytics(args, parser):
+    rows, cols, mines = board_config(args, parser)
+    analytics_mode(rows, cols, mines, args.boards, seed=args.seed, workers=args.workers, cache=not args.no_cache,
+                   plots=not args.no_plots, save_format=args.save, solver_games=args.solver_games,
+                   profile=args.profile, profile_file=args.profile_file, policy=args.policy,
+                   output_dir=args.output_dir)
+    return 0
+
+
+def run_sweep(args, parser):
+    summary = sweep_mode(args.rows, args.cols, args.mines, args.boards, seed=args.seed, workers=args.workers,
+                         plots=not args.no_plots, profile=args.profile, output_dir=args.output_dir)
+    return 0 if summary else 1
+
+
+def run_bench(args, parser):
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        args.output = os.path.join(args.output_dir, args.output)
+    return benchmarks.run(args)
+
+
+def run_highscores(args, parser):
+    highscores.HIGHSCORES_BACKEND = args.highscores_backend or highscores.HIGHSCORES_BACKEND
+    if args.preset or args.rows is not None or args.cols is not None or args.mines is not None:
+        print_highscores_for_config(*board_config(args, parser))
+        return 0
+    # No configuration given: every configuration with scores, smallest boards first
+    configs = sorted(tuple(int(part) for part in key.split("x")) for key in highscores.load_highscores())
+    if not configs:
+        print("No highscores recorded yet.")
+    for rows, cols, mines in configs:
+        print_highscores_for_config(rows, cols, mines)
+    return 0
+
+
+def build_parser():
+    """The argparse parser with one subcommand per mode."""
+    parser = argparse.ArgumentParser(description="Minesweeper game and board analytics. "
+                                                 "Run without arguments for the interactive menu.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    config = argparse.ArgumentParser(add_help=False)
+    config.add_argument("--preset", choices=PRESETS, help="preset difficulty (default: normal)")
+    config.add_argument("--rows", type=positive_int, help="board rows (overrides the preset)")
+    config.add_argument("--cols", type=positive_int, help="board columns (overrides the preset)")
+    config.add_argument("--mines", type=positive_int, help="number of mines (overrides the preset)")
+
+    batch = argparse.ArgumentParser(add_help=False)
+    batch.add_argument("--boards", type=positive_int, default=1000, help="boards to generate (default: 1000)")
+    batch.add_argument("--seed", type=non_negative_int, help="master seed; makes the run reproducible (and cacheable)")
+    batch.add_argument("--workers", type=positive_int, default=1, help="worker processes (default: 1)")
+    batch.add_argument("--output-dir", help="directory for plots and result files (default: current directory)")
+    batch.add_argument("--profile", action="store_true", help="time every stage and print the breakdown")
+    batch.add_argument("--no-plots", action="store_true", help="skip the Matplotlib figures")
+
+    backend = argparse.ArgumentParser(add_help=False)
+    backend.add_argument("--highscores-backend", choices=("json", "sqlite"),
+                         help="highscores storage (default: $MINESWEEPER_HIGHSCORES_BACKEND or json)")
+
+    play = commands.add_parser("play", parents=[config, backend], help="play a game in the terminal")
+    play.add_argument("--seed", type=non_negative_int, help="fixes the mine layout")
+    play.add_argument("--replays", help="replay archive to append the game to "
+                                        "(default: $MINESWEEPER_REPLAYS_FILE or minesweeper_replays.bin)")
+    play.set_defaults(func=run_play, command_parser=play)
+
+    analytics = commands.add_parser("analytics", parents=[config, batch], help="statistics over random boards")
+    analytics.add_argument("--policy", choices=FIRST_CLICK_POLICIES, default="none",
+                           help="first-click policy (default: none)")
+    analytics.add_argument("--solver-games", type=non_negative_int, default=0, help="solver games for the win rate (default: 0)")
+    analytics.add_argument("--save", choices=("npz", "json"), help="also save the raw results in this format")
+    analytics.add_argument("--no-cache", action="store_true", help="neither read nor write the analytics cache")
+    analytics.add_argument("--profile-file", help="dump cProfile stats of the run to this file")
+    analytics.set_defaults(func=run_analytics, command_parser=analytics)
+
+    sweep = commands.add_parser("sweep", parents=[batch], help="analytics over a grid of board sizes and mines")
+    sweep.add_argument("--rows", type=parse_values, default=[16], help="e.g. 16, 9,16,30 or 10-30:10 (default: 16)")
+    sweep.add_argument("--cols", type=parse_values, default=[16], help="same forms as --rows (default: 16)")
+    sweep.add_argument("--mines", type=parse_values, default=list(range(10, 61, 10)),
+                       help="same forms as --rows (default: 10-60:10)")
+    sweep.set_defaults(func=run_sweep, command_parser=sweep)
+
+    bench = commands.add_parser("bench", help="performance benchmarks (see benchmarks.py)")
+    benchmarks.add_arguments(bench)
+    bench.add_argument("--output-dir", help="directory for the JSON results (default: current directory)")
+    bench.set_defaults(func=run_bench, command_parser=bench)
+
+    scores = commands.add_parser("highscores", parents=[config, backend],
+                                 help="show the highscores of one configuration, or of all")
+    scores.set_defaults(func=run_highscores, command_parser=scores)
+    return parser
+
+
+def main(argv=None):
+    """Runs one subcommand and returns its exit code; without arguments, the interactive menu."""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        interactive_menu()
+        return 0
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    return args.func(args, args.command_parser)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,30 +3,40 @@
 # This file contains the main 'MIndsweeper' class, which acts as the game engine.
 
 
-import random
 from collections import deque
 
+import numpy as np
+
+# Preset difficulties as (rows, cols, mines), by name (e.g. for the command line)
+PRESETS = {
+    "easy": (9, 9, 10),
+    "normal": (16, 16, 40),
+    "expert": (30, 16, 99),
+}
+# Preset names by difficulty level, as in the menu: 0 = Easy, 1 = Normal, 2 = Expert
+DIFFICULTIES = ("easy", "normal", "expert")
+
+
+def preset_config(difficulty):
+    """(rows, cols, mines) of a difficulty level (0, 1, 2); anything else gives Normal."""
+    if difficulty not in (0, 1, 2):
+        difficulty = 1
+    return PRESETS[DIFFICULTIES[difficulty]]
+
+
 class Minesweeper:
     """
     Minesweeper game engine.
     ... (docstring) ...
     """
 
-    def __init__(self, difficulty=None, rows=None, cols=None, nBombs=None):
+    def __init__(self, difficulty=None, rows=None, cols=None, nBombs=None, seed=None, rng=None):
         
         
         if rows is not None and cols is not None and nBombs is not None:
             self.rows, self.cols, self.nBombs = rows, cols, nBombs
         else:
-            if difficulty == 0:
-                self.rows, self.cols, self.nBombs = 9, 9, 10
-            elif difficulty == 1 or difficulty is None:
-                self.rows, self.cols, self.nBombs = 16, 16, 40
-            elif difficulty == 2:
-               
-                self.rows, self.cols, self.nBombs = 30, 16, 99
-            else:
-                self.rows, self.cols, self.nBombs = 16, 16, 40
+            self.rows, self.cols, self.nBombs = preset_config(difficulty)
 
         # Game state
         self.revealed = set()
@@ -38,6 +48,10 @@ class Minesweeper:
         # 1-8 = Number
         self.values = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
         self.first_click = False # Flag to track if the timer should start
+        # Cells revealed/flagged since the last take_changes() (for incremental rendering)
+        self.changes = []
+        # Random source for mine placement: a numpy Generator, or one created from 'seed'
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
 
     def inside(self, r, c):
         """Helper function to check if a coordinate is within the board bounds."""
@@ -59,36 +73,28 @@ class Minesweeper:
                 if self.inside(neighbor_r, neighbor_c):
                     yield neighbor_r, neighbor_c
 
-    def place_mines(self, safe=None):
+    def place_mines(self, safe=None, rng=None):
         """
         Place mines on the board.
         If 'safe' is provided (e.g., (r, c)), no mine will be placed
         on that cell or its 8 neighbors. This is for the "safe-first-click" rule.
         If 'safe' is None (for analytics), mines are placed completely randomly.
+        Draws from 'rng' if given, else from the game's own generator; the
+        layout is the one generate_boards gives for a single board.
         """
-        all_cells = [(r, c) for r in range(self.rows) for c in range(self.cols)]
-        
-        if safe is None:
-            # Analytics mode: no safe area
-            candidates = all_cells[:]
-        else:
-            # Gameplay mode: create a "safe zone"
-            avoid = {safe, *self.neighbors(*safe)}
-            candidates = [c for c in all_cells if c not in avoid]
-            if len(candidates) < self.nBombs:
-                # This is a rare edge case (e.g, 3x3 board with 8 mines)
-                candidates = all_cells[:]
-
-        self.mines = set(random.sample(candidates, self.nBombs))
-
+        mines, _ = generate_boards(self.rows, self.cols, self.nBombs, 1, safe=safe,
+                                   rng=rng if rng is not None else self.rng)
         # After placing mines, pre caculate the 'values' for all cells
-        for r in range(self.rows):
-            for c in range(self.cols):
-                if (r, c) in self.mines:
-                    self.values[r][c] = -1 # -1 represents a mine
-                else:
-                    # Count mines in the 8-cell neighborhood
-                    self.values[r][c] = sum((nr, nc) in self.mines for nr, nc in self.neighbors(r, c))
+        self.set_mines(mines[0])
+
+    def set_mines(self, mines):
+        """
+        Use a given mine layout instead of a random one (e.g. to replay a game).
+        'mines' is a boolean (rows, cols) mask.
+        """
+        mines = np.asarray(mines, dtype=bool).reshape(self.rows, self.cols)
+        self.mines = {(int(r), int(c)) for r, c in np.argwhere(mines)}
+        self.values = board_values(mines).tolist()
 
     def reveal(self, r, c):
         """
@@ -102,26 +108,30 @@ class Minesweeper:
 
         if (r, c) in self.mines:
             self.revealed.add((r, c))
+            self.changes.append((r, c))
             return True  # B-O-O-M! Hit a mine.
 
-        # Use a queue for a Breadth-First Search (BFS) to flood-fill
+        if (r, c) in self.revealed:
+            return False
+
+        # Use a queue for a Breadth-First Search (BFS) to flood-fill.
+        # Cells are marked as revealed when they are queued, so no cell is queued twice.
+        self.revealed.add((r, c))
+        self.changes.append((r, c))
         queue = deque([(r, c)])
 
         while queue:
-           
+
             current_r, current_c = queue.popleft()
-            
-            if (current_r, current_c) in self.revealed:
-                continue
-                
-            self.revealed.add((current_r, current_c))
 
             # If this cell is a '0' (blank), add its neighbors to the queue
             if self.values[current_r][current_c] == 0:
-                
-                for neighbor_r, neighbor_c in self.neighbors(current_r, current_c):
-                    if (neighbor_r, neighbor_c) not in self.revealed and (neighbor_r, neighbor_c) not in self.flags:
-                        queue.append((neighbor_r, neighbor_c))
+
+                for neighbor in self.neighbors(current_r, current_c):
+                    if neighbor not in self.revealed and neighbor not in self.flags:
+                        self.revealed.add(neighbor)
+                        self.changes.append(neighbor)
+                        queue.append(neighbor)
         return False # No mine hit
 
     def toggle_flag(self, r, c):
@@ -133,6 +143,13 @@ class Minesweeper:
             self.flags.remove((r, c))
         else:
             self.flags.add((r, c))
+        self.changes.append((r, c))
+
+    def take_changes(self):
+        """Flat indices (r*cols + c) of the cells changed since the last call."""
+        changed = np.array([r * self.cols + c for r, c in self.changes], dtype=np.int64)
+        self.changes = []
+        return changed
 
     def won(self):
         """Win condition: all non-mine cells are revealed."""
@@ -140,8 +157,10 @@ class Minesweeper:
 
     def display(self, reveal_mines=False):
         """Textual board display."""
+        # Row labels are right-aligned to the widest one (at least 2 characters)
+        width = max(2, len(str(self.rows - 1)))
         # Column headers
-        print("\n   " + " ".join(f"{i:2d}" for i in range(self.cols)))
+        print("\n" + " " * (width + 1) + " ".join(f"{i:2d}" for i in range(self.cols)))
         
         for r in range(self.rows):
             
@@ -159,5 +178,125 @@ class Minesweeper:
                         row_str_parts.append("* ") # '*' for Mine (on game over)
                     else:
                         row_str_parts.append("# ") # '#' for Unrevealed
-            print(f"{r:2d} " + "".join(row_str_parts))
-        print()
\ No newline at end of file
+            print(f"{r:{width}d} " + "".join(row_str_parts))
+        print()
+
+
+# -----------------------
+# Batch board generation
+# -----------------------
+
+def safe_zone(rows, cols, safe):
+    """
+    Boolean (rows, cols) mask of the "safe-first-click" zone:
+    the 'safe' cell and its 8 neighbors.
+    """
+    zone = np.zeros((rows, cols), dtype=bool)
+    r, c = safe
+    zone[max(r - 1, 0):r + 2, max(c - 1, 0):c + 2] = True
+    return zone
+
+
+def safe_zones(rows, cols, cells):
+    """
+    safe_zone for a whole batch: 'cells' is an int array (num_boards, 2) of
+    one safe cell per board; returns a boolean (num_boards, rows, cols) mask.
+    """
+    cells = np.asarray(cells)
+    near_r = np.abs(np.arange(rows)[None, :] - cells[:, :1]) <= 1
+    near_c = np.abs(np.arange(cols)[None, :] - cells[:, 1:]) <= 1
+    return near_r[:, :, None] & near_c[:, None, :]
+
+
+def count_neighbours(grid, include_self=False):
+    """
+    Sum the 8-connected neighbors of every cell over the last two axes of 'grid'.
+    Works on a single (rows, cols) board or a (num_boards, rows, cols) batch,
+    using shifted slices of a zero-padded copy instead of per-cell loops.
+    With 'include_self' the cell itself is added too (full 3x3 sum).
+    """
+    grid = np.asarray(grid)
+    if grid.dtype == bool:
+        grid = grid.astype(np.int8) # at most 9 per cell, fits in int8
+    rows, cols = grid.shape[-2:]
+    pad_width = [(0, 0)] * (grid.ndim - 2) + [(1, 1), (1, 1)]
+    padded = np.pad(grid, pad_width)
+
+    total = np.zeros_like(grid)
+    for dr in (0, 1, 2):
+        for dc in (0, 1, 2):
+            if dr == 1 and dc == 1 and not include_self:
+                continue
+            total += padded[..., dr:dr + rows, dc:dc + cols]
+    return total
+
+
+def board_values(mines):
+    """
+    Turn a boolean mine mask (single board or batch) into the int8 'values'
+    layout used by Minesweeper: -1 = mine, 0-8 = neighboring mine count.
+    """
+    values = count_neighbours(mines).astype(np.int8)
+    values[mines] = -1
+    return values
+
+
+def _mine_keys(rows, cols, nBombs, num_boards, safe, rng):
+    """
+    Every cell gets a random key; the nBombs smallest keys on a board are its mines.
+    This is a uniform sample without replacement, done for all boards in one call.
+    Exactly rows*cols values are drawn per board, in board order.
+    """
+    rng = np.random.default_rng(rng)
+    n_cells = rows * cols
+    keys = rng.random((num_boards, n_cells))
+    if safe is not None and np.ndim(safe) == 1:
+        avoid = safe_zone(rows, cols, safe).ravel()
+        if n_cells - avoid.sum() >= nBombs:
+            keys[:, avoid] = 2.0 # keys are < 1, so these cells are never picked
+        # else: same edge case as place_mines, fall back to all cells
+    elif safe is not None:
+        # One safe cell per board; zones on the edges are smaller, so the
+        # fallback is decided board by board
+        avoid = safe_zones(rows, cols, safe).reshape(num_boards, n_cells)
+        avoid &= (n_cells - avoid.sum(axis=1) >= nBombs)[:, None]
+        keys[avoid] = 2.0
+    return keys
+
+
+def generate_boards(rows, cols, nBombs, num_boards, safe=None, rng=None):
+    """
+    Generate 'num_boards' random boards at once.
+    Returns (mines, values): a bool tensor of shape (num_boards, rows, cols)
+    and an int8 tensor of the same shape (see board_values).
+    'safe' works like in Minesweeper.place_mines, or is an int array
+    (num_boards, 2) with a different safe cell for every board.
+    'rng' is a numpy Generator, or a seed used to create one.
+    """
+    n_cells = rows * cols
+    keys = _mine_keys(rows, cols, nBombs, num_boards, safe, rng)
+
+    mines = np.zeros((num_boards, n_cells), dtype=bool)
+    if nBombs >= n_cells:
+        mines[:] = True
+    elif nBombs > 0:
+        picks = np.argpartition(keys, nBombs - 1, axis=1)[:, :nBombs]
+        np.put_along_axis(mines, picks, True, axis=1)
+
+    mines = mines.reshape(num_boards, rows, cols)
+    return mines, board_values(mines)
+
+
+
+def mine_ranks(rows, cols, num_boards, rng=None):
+    """
+    Like generate_boards(safe=None), but for every mine count at once: returns
+    an int32 tensor (num_boards, rows, cols) where 'ranks < nBombs' is the mine
+    mask generate_boards would give for nBombs with the same random stream.
+    """
+    n_cells = rows * cols
+    keys = _mine_keys(rows, cols, 0, num_boards, None, rng)
+    order = np.argsort(keys, axis=1)
+    ranks = np.empty_like(order, dtype=np.int32)
+    np.put_along_axis(ranks, order, np.arange(n_cells, dtype=np.int32)[None, :], axis=1)
+    return ranks.reshape(num_boards, rows, cols)
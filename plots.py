@@ -0,0 +1,193 @@
+# plots.py
+
+# This module renders the analytics figures. It is kept apart from the computation
+# so headless runs never import Matplotlib, and figures can be drawn in parallel.
+
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+def _pyplot():
+    """Imports pyplot on first use, with the non-interactive Agg backend (files only)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def output_path(fname, output_dir=None):
+    """'fname' inside 'output_dir' (created if needed), or as is without one."""
+    if not output_dir:
+        return fname
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, fname)
+
+
+def hist_span(hist):
+    """Smallest and largest value with a non-zero count in a histogram array."""
+    occupied = np.flatnonzero(hist)
+    return int(occupied[0]), int(occupied[-1])
+
+
+def plot_empty_hist(result, output_dir=None):
+    """1) Histogram of empty (white) cells"""
+    plt = _pyplot()
+    rows, cols, nBombs = result.rows, result.cols, result.nBombs
+    plt.figure(figsize=(10, 6))
+    lo, hi = hist_span(result.empty_hist)
+    plt.hist(range(lo, hi + 1), bins=range(lo, hi + 2), weights=result.empty_hist[lo:hi + 1], alpha=0.7, edgecolor='black')
+    plt.title(f"Distribution of Empty (0) Cells Per Board ({rows}x{cols}, {nBombs} mines)")
+    plt.xlabel("Number of Empty Cells")
+    plt.ylabel("Frequency (out of {num_boards} boards)")
+    plt.grid(True)
+    fname = output_path(f"empty_cells_hist_{result.config_name()}.png", output_dir)
+    plt.savefig(fname)
+    plt.close()
+    return fname
+
+
+def plot_number_dist(result, output_dir=None):
+    """2) Distribution of cell numbers"""
+    plt = _pyplot()
+    rows, cols, nBombs = result.rows, result.cols, result.nBombs
+    numbers = np.flatnonzero(result.number_counts).tolist() # values that actually occurred
+    # Get the *average* count per board by dividing by num_boards
+    counts = [result.number_counts[k] / result.num_boards for k in numbers]
+    plt.figure(figsize=(10, 6))
+    plt.bar(numbers, counts, edgecolor='black')
+    plt.title(f"Average Cell Values Per Board ({rows}x{cols}, {nBombs} mines)")
+    plt.xlabel("Cell Value (0 = blank)")
+    plt.ylabel("Average Count Per Board")
+    plt.grid(True)
+    fname = output_path(f"number_cells_dist_{result.config_name()}.png", output_dir)
+    plt.savefig(fname)
+    plt.close()
+    return fname
+
+
+def plot_cluster_hist(result, output_dir=None):
+    """3) Histogram of mine clusters"""
+    plt = _pyplot()
+    rows, cols, nBombs = result.rows, result.cols, result.nBombs
+    plt.figure(figsize=(10, 6))
+    lo, hi = hist_span(result.cluster_hist)
+    plt.hist(range(lo, hi + 1), bins=range(lo, hi + 2), weights=result.cluster_hist[lo:hi + 1], alpha=0.7, edgecolor='black')
+    plt.title(f"Distribution of Mine Clusters Per Board ({rows}x{cols}, {nBombs} mines)")
+    plt.xlabel("Number of Mine Clusters")
+    plt.ylabel("Frequency (out of {num_boards} boards)")
+    plt.grid(True)
+    fname = output_path(f"mine_clusters_hist_{result.config_name()}.png", output_dir)
+    plt.savefig(fname)
+    plt.close()
+    return fname
+
+
+def plot_cluster_sizes(result, output_dir=None):
+    """4) Distribution of mine cluster sizes"""
+    plt = _pyplot()
+    rows, cols, nBombs = result.rows, result.cols, result.nBombs
+    sizes = np.flatnonzero(result.cluster_sizes).tolist()
+    # Average number of clusters of each size per board
+    size_counts = [result.cluster_sizes[k] / result.num_boards for k in sizes]
+    plt.figure(figsize=(10, 6))
+    plt.bar(sizes, size_counts, edgecolor='black')
+    plt.title(f"Average Mine Cluster Sizes Per Board ({rows}x{cols}, {nBombs} mines)")
+    plt.xlabel("Mines in Cluster")
+    plt.ylabel("Average Clusters Per Board")
+    plt.grid(True)
+    fname = output_path(f"mine_cluster_sizes_{result.config_name()}.png", output_dir)
+    plt.savefig(fname)
+    plt.close()
+    return fname
+
+
+def plot_heatmap(result, output_dir=None):
+    """5) Heatmap of 3x3 neighborhood mine count"""
+    plt = _pyplot()
+    rows, cols, nBombs = result.rows, result.cols, result.nBombs
+    plt.figure(figsize=(12, 9)) # Adjusted figsize for better layout
+    # Get the average by dividing the sum by num_boards
+    neighbourhood_avg = result.neighbourhood_sum / result.num_boards
+    plt.imshow(neighbourhood_avg, interpolation='nearest', cmap='viridis')
+    plt.colorbar(label="Average mines in 3x3 neighbourhood")
+    plt.title(f"Average 3x3 Neighbourhood Mine Count ({rows}x{cols}, {nBombs} mines)")
+    fname = output_path(f"mine_neighbourhood_heatmap_{result.config_name()}.png", output_dir)
+    plt.savefig(fname)
+    plt.close()
+    return fname
+
+
+def plot_bbbv_hist(result, output_dir=None):
+    """6) Histogram of board difficulty (3BV)"""
+    plt = _pyplot()
+    rows, cols, nBombs = result.rows, result.cols, result.nBombs
+    plt.figure(figsize=(10, 6))
+    lo, hi = hist_span(result.bbbv_hist)
+    plt.hist(range(lo, hi + 1), bins=range(lo, hi + 2), weights=result.bbbv_hist[lo:hi + 1], alpha=0.7, edgecolor='black')
+    plt.title(f"Distribution of 3BV Per Board ({rows}x{cols}, {nBombs} mines)")
+    plt.xlabel("3BV (minimum clicks to clear the board)")
+    plt.ylabel(f"Frequency (out of {result.num_boards} boards)")
+    plt.grid(True)
+    fname = output_path(f"bbbv_hist_{result.config_name()}.png", output_dir)
+    plt.savefig(fname)
+    plt.close()
+    return fname
+
+
+def plot_opening_hist(result, output_dir=None):
+    """7) Histogram of cells revealed by the first click"""
+    plt = _pyplot()
+    rows, cols, nBombs = result.rows, result.cols, result.nBombs
+    plt.figure(figsize=(10, 6))
+    lo, hi = hist_span(result.opening_hist)
+    plt.hist(range(lo, hi + 1), bins=range(lo, hi + 2), weights=result.opening_hist[lo:hi + 1], alpha=0.7,
+             edgecolor='black')
+    plt.title(f"Cells Opened by the First Click ({rows}x{cols}, {nBombs} mines, first click: {result.policy})")
+    plt.xlabel("Cells revealed (0 = hit a mine)")
+    plt.ylabel(f"Frequency (out of {result.num_boards} boards)")
+    plt.grid(True)
+    fname = output_path(f"opening_sizes_{result.config_name()}.png", output_dir)
+    plt.savefig(fname)
+    plt.close()
+    return fname
+
+
+# Figures drawn for every analytics run, in order
+ANALYTICS_FIGURES = (plot_empty_hist, plot_number_dist, plot_cluster_hist, plot_cluster_sizes, plot_heatmap,
+                     plot_bbbv_hist, plot_opening_hist)
+
+
+def _draw(plot_func, result, output_dir):
+    return plot_func(result, output_dir)
+
+
+def render(result, figures=ANALYTICS_FIGURES, workers=1, output_dir=None):
+    """
+    Draws 'figures' for an analytics result into 'output_dir' (the current
+    directory by default) and returns their file names.
+    With workers > 1 each figure is drawn in its own worker process.
+    """
+    if workers > 1 and len(figures) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(figures))) as executor:
+            return list(executor.map(_draw, figures, [result] * len(figures), [output_dir] * len(figures)))
+    return [plot_func(result, output_dir) for plot_func in figures]
+
+
+def plot_vs_density(summary, column, ylabel, fname):
+    """Sweep plot: one summary column against mine density, one line per board size."""
+    plt = _pyplot()
+    plt.figure(figsize=(10, 6))
+    for rows, cols in sorted({(row["rows"], row["cols"]) for row in summary}):
+        points = [row for row in summary if row["rows"] == rows and row["cols"] == cols]
+        plt.plot([row["density"] for row in points], [row[column] for row in points],
+                 marker="o", label=f"{rows}x{cols}")
+    plt.title(f"{ylabel} vs. Mine Density")
+    plt.xlabel("Mine Density (mines / cells)")
+    plt.ylabel(ylabel)
+    plt.legend()
+    plt.grid(True)
+    plt.savefig(fname)
+    plt.close()
+    return fname
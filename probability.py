@@ -0,0 +1,223 @@
+# probability.py
+
+# This module computes exact mine probabilities for the hidden cells of a
+# partially revealed game (used by the 'hint' command and by the solver).
+
+
+from functools import lru_cache
+from math import exp, lgamma
+import numpy as np
+
+
+def _log_comb(n, k):
+    """log(n choose k), 0 <= k <= n."""
+    return lgamma(n + 1) - lgamma(k + 1) - lgamma(n - k + 1)
+
+
+def frontier_constraints(game, known_mines=(), revealed=None):
+    """
+    (hidden_cells, mines_left) for every revealed number next to hidden cells.
+    Cells in 'known_mines' count as placed mines; player flags are ignored,
+    since they may be wrong.
+    """
+    known_mines = set(known_mines)
+    if revealed is None:
+        revealed = game.revealed
+    constraints = []
+    for r, c in revealed:
+        value = int(game.values[r][c])
+        if value <= 0:
+            continue
+        unknown = []
+        mines_left = value
+        for neighbor in game.neighbors(r, c):
+            if neighbor in known_mines:
+                mines_left -= 1
+            elif neighbor not in revealed:
+                unknown.append(neighbor)
+        if unknown:
+            constraints.append((frozenset(unknown), mines_left))
+    return constraints
+
+
+def split_components(constraints):
+    """Groups constraints into independent components (no shared cells between groups)."""
+    parent = list(range(len(constraints)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    owner = {}
+    for i, (cells, _) in enumerate(constraints):
+        for cell in cells:
+            if cell in owner:
+                parent[find(i)] = find(owner[cell])
+            else:
+                owner[cell] = i
+
+    groups = {}
+    for i, constraint in enumerate(constraints):
+        groups.setdefault(find(i), []).append(constraint)
+    return list(groups.values())
+
+
+def _signature(component):
+    """
+    Canonical form of a component: its cells (in an order that keeps few
+    constraints open at a time) and its constraints over local cell indices.
+    Components with the same shape share a signature, and so a cached result.
+    """
+    constraints = sorted(set(component), key=lambda con: sorted(con[0]))
+    touching = {}
+    for con in constraints:
+        for cell in con[0]:
+            touching.setdefault(cell, []).append(con)
+
+    # Breadth-first order over shared constraints
+    cells = []
+    seen = set()
+    for start in sorted(touching):
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = [start]
+        while queue:
+            cell = queue.pop(0)
+            cells.append(cell)
+            for con in touching[cell]:
+                for other in sorted(con[0]):
+                    if other not in seen:
+                        seen.add(other)
+                        queue.append(other)
+
+    local = {cell: i for i, cell in enumerate(cells)}
+    signature = tuple(sorted((tuple(sorted(local[cell] for cell in con[0])), con[1]) for con in constraints))
+    return cells, signature
+
+
+@lru_cache(maxsize=4096)
+def enumerate_component(signature):
+    """
+    Counts the mine layouts of one component that satisfy all its constraints.
+    Returns {k: (ways, mine_counts)}: for layouts with k mines, how many there
+    are and, per local cell, in how many of them that cell is a mine.
+    Backtracks cell by cell; subproblems are memoized on the remaining mine
+    counts of the constraints still open, so chain-like frontiers stay cheap.
+    """
+    n_cells = 1 + max(i for cells, _ in signature for i in cells)
+    of_cell = [[] for _ in range(n_cells)]
+    last = []
+    for cid, (cells, _) in enumerate(signature):
+        for i in cells:
+            of_cell[i].append(cid)
+        last.append(max(cells))
+    # Constraints open at position pos: started before it and not yet finished
+    first = [min(cells) for cells, _ in signature]
+    open_at = [[cid for cid in range(len(signature)) if first[cid] < pos <= last[cid]] for pos in range(n_cells + 1)]
+    # Cells of each constraint after position pos, to prune counts that can no longer be met
+    after = [[sum(1 for i in cells if i > pos) for cells, _ in signature] for pos in range(n_cells)]
+
+    memo = {}
+
+    def solve(pos, residual):
+        if pos == n_cells:
+            return {0: (1.0, np.zeros(0))}
+        key = (pos, tuple(residual[cid] for cid in open_at[pos]))
+        if key in memo:
+            return memo[key]
+
+        result = {}
+        for mine in (0, 1):
+            ok = True
+            next_residual = list(residual)
+            for cid in of_cell[pos]:
+                left = residual[cid] - mine
+                if left < 0 or left > after[pos][cid]:
+                    ok = False
+                    break
+                next_residual[cid] = left
+            if not ok:
+                continue
+            for k, (ways, counts) in solve(pos + 1, next_residual).items():
+                entry = np.concatenate(([ways * mine], counts))
+                if k + mine in result:
+                    total, total_counts = result[k + mine]
+                    result[k + mine] = (total + ways, total_counts + entry)
+                else:
+                    result[k + mine] = (ways, entry)
+        memo[key] = result
+        return result
+
+    return solve(0, [count for _, count in signature])
+
+
+def _convolve(dist_a, dist_b):
+    """Combines two {mines: ways} distributions of independent parts."""
+    combined = {}
+    for ka, wa in dist_a.items():
+        for kb, wb in dist_b.items():
+            combined[ka + kb] = combined.get(ka + kb, 0.0) + wa * wb
+    return combined
+
+
+def mine_probabilities(game, known_mines=()):
+    """
+    Exact mine probability of every hidden cell of 'game' (Minesweeper or
+    CompactMinesweeper), as {(r, c): p}, given the revealed numbers and the
+    total mine count. Cells in 'known_mines' are treated as certain mines and
+    left out. Raises ValueError if the revealed numbers are contradictory.
+    """
+    known_mines = set(known_mines)
+    revealed = game.revealed # A fresh set per access on CompactMinesweeper, so read it once
+    components = []
+    frontier = set()
+    for component in split_components(frontier_constraints(game, known_mines, revealed)):
+        cells, signature = _signature(component)
+        components.append((cells, enumerate_component(signature)))
+        frontier.update(cells)
+
+    hidden_count = game.rows * game.cols - len(revealed) - len(known_mines)
+    interior = hidden_count - len(frontier) # Hidden cells next to no number
+    mines_left = game.nBombs - len(known_mines)
+
+    # Mine-count distribution of all components except component j, for every j
+    dists = [{k: ways for k, (ways, _) in result.items()} for _, result in components]
+    prefix = [{0: 1.0}]
+    for dist in dists:
+        prefix.append(_convolve(prefix[-1], dist))
+    suffix = [{0: 1.0}]
+    for dist in reversed(dists):
+        suffix.append(_convolve(suffix[-1], dist))
+    suffix.reverse()
+
+    # Each frontier total t leaves mines_left - t mines for the interior:
+    # weight(t) = C(interior, mines_left - t), scaled by its largest value
+    log_weights = {t: _log_comb(interior, mines_left - t) for t in prefix[-1] if 0 <= mines_left - t <= interior}
+    if not log_weights:
+        raise ValueError("The revealed numbers are inconsistent with the mine count.")
+    top = max(log_weights.values())
+    weight = {t: exp(lw - top) for t, lw in log_weights.items()}
+    total = sum(prefix[-1][t] * w for t, w in weight.items())
+
+    probabilities = {}
+    for j, (cells, result) in enumerate(components):
+        others = _convolve(prefix[j], suffix[j + 1])
+        mine_weight = np.zeros(len(cells))
+        for k, (_, counts) in result.items():
+            factor = sum(ways * weight.get(k + t, 0.0) for t, ways in others.items())
+            mine_weight += counts * factor
+        for cell, w in zip(cells, mine_weight / total):
+            probabilities[cell] = float(w)
+
+    if interior:
+        expected = sum(prefix[-1][t] * w * (mines_left - t) for t, w in weight.items()) / total
+        p_interior = expected / interior
+        for r in range(game.rows):
+            for c in range(game.cols):
+                cell = (r, c)
+                if cell not in frontier and cell not in known_mines and cell not in revealed:
+                    probabilities[cell] = p_interior
+    return probabilities
@@ -0,0 +1,359 @@
+# replay.py
+
+# This module records played games in a compact binary format and replays them
+# headlessly, to verify highscores and to study move timings. Archives are read
+# through a memory map, so they never have to fit in memory.
+
+
+import os
+import sys
+import time
+import numpy as np
+from analytics import run_batches
+from highscores import config_key, load_highscores
+from minesweeper_game import Minesweeper
+
+# Replays of finished games are appended to this archive (relative paths are
+# taken from the current directory, like the highscores file)
+REPLAYS_FILE = os.environ.get("MINESWEEPER_REPLAYS_FILE", "minesweeper_replays.bin")
+
+MAGIC = b"MSRP"
+VERSION = 1
+
+# Move actions
+REVEAL = 0
+FLAG = 1
+
+# Game outcomes
+ABANDONED = 0
+WON = 1
+LOST = 2
+OUTCOME_NAMES = {ABANDONED: "abandoned", WON: "won", LOST: "lost"}
+
+# Invalid replays listed by verify_archive (the rest are only counted)
+MAX_REPORTED = 20
+# Largest gap (seconds) allowed between the last move and the recorded time of a win
+MAX_FINISH_GAP = 1.0
+
+# One record in an archive:
+#   header (32 bytes) | mine layout (np.packbits, ceil(rows*cols / 8) bytes) | moves
+# All fields are little-endian and packed, with no padding.
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u2"),
+    ("outcome", "u1"),
+    ("reserved", "u1"),
+    ("rows", "<u4"),
+    ("cols", "<u4"),
+    ("nBombs", "<u4"),
+    ("num_moves", "<u4"),
+    ("elapsed", "<f8"), # Seconds from the first click to the end of the game
+])
+# 't' is the time of the move, in seconds after the first click
+MOVE_DTYPE = np.dtype([("action", "u1"), ("r", "<u4"), ("c", "<u4"), ("t", "<f4")])
+
+
+class Replay:
+    """
+    One recorded game: the board configuration, its mine layout (bool
+    (rows, cols) mask), the moves as a MOVE_DTYPE array, the outcome and the
+    recorded time. Replays read from an archive hold views into its memory map.
+    """
+
+    def __init__(self, rows, cols, nBombs, mines, moves, outcome, elapsed):
+        self.rows, self.cols, self.nBombs = rows, cols, nBombs
+        self.mines = mines
+        self.moves = moves
+        self.outcome = outcome
+        self.elapsed = elapsed
+
+    @classmethod
+    def from_game(cls, game, moves, outcome, elapsed):
+        """Replay of a game played on a Minesweeper or CompactMinesweeper; 'moves' lists (action, r, c, t)."""
+        if hasattr(game, "mine_mask"):
+            mines = game.mine_mask.reshape(game.rows, game.cols).astype(bool)
+        else:
+            mines = np.zeros((game.rows, game.cols), dtype=bool)
+            for r, c in game.mines:
+                mines[r, c] = True
+        return cls(game.rows, game.cols, game.nBombs, mines, np.array(moves, dtype=MOVE_DTYPE), outcome, elapsed)
+
+    def to_bytes(self):
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header[0] = (MAGIC, VERSION, self.outcome, 0, self.rows, self.cols, self.nBombs, len(self.moves), self.elapsed)
+        layout = np.packbits(np.asarray(self.mines, dtype=bool).ravel())
+        return header.tobytes() + layout.tobytes() + np.asarray(self.moves, dtype=MOVE_DTYPE).tobytes()
+
+
+def append_replay(replay, path=None):
+    """
+    Appends one replay to an archive (REPLAYS_FILE by default, created if
+    needed). Returns the byte offset of the new record, which identifies it
+    in the archive (see read_replay).
+    """
+    data = replay.to_bytes()
+    with open(path or REPLAYS_FILE, "ab") as f:
+        f.write(data)
+        f.flush()
+        # In append mode the position is now the end of this record, even if
+        # another session appended to the archive in between
+        return f.tell() - len(data)
+
+
+def _read_header(data, offset, path):
+    """Checked header of the record at 'offset'; returns (header, layout_bytes, moves_bytes)."""
+    if data.size - offset < HEADER_DTYPE.itemsize:
+        raise ValueError(f"Truncated replay header at byte {offset} of {path}")
+    header = data[offset:offset + HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+    if header["magic"] != MAGIC or header["version"] != VERSION:
+        raise ValueError(f"Not a replay record at byte {offset} of {path}")
+    layout_bytes = -(-int(header["rows"]) * int(header["cols"]) // 8) # ceil division
+    moves_bytes = int(header["num_moves"]) * MOVE_DTYPE.itemsize
+    if data.size - offset - HEADER_DTYPE.itemsize < layout_bytes + moves_bytes:
+        raise ValueError(f"Truncated replay at byte {offset} of {path}")
+    return header, layout_bytes, moves_bytes
+
+
+def _open_archive(path):
+    """Read-only memory map of an archive (None if it is missing or empty)."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+def record_offsets(path=None):
+    """Byte offset of every record in an archive, from the headers alone."""
+    path = path or REPLAYS_FILE
+    data = _open_archive(path)
+    offsets = []
+    offset = 0
+    while data is not None and offset < data.size:
+        _, layout_bytes, moves_bytes = _read_header(data, offset, path)
+        offsets.append(offset)
+        offset += HEADER_DTYPE.itemsize + layout_bytes + moves_bytes
+    return offsets
+
+
+def read_replay(data, offset, path=None):
+    """The replay stored at 'offset' of a memory-mapped archive; its moves are a view into the map."""
+    path = path or REPLAYS_FILE
+    header, layout_bytes, moves_bytes = _read_header(data, offset, path)
+    rows, cols = int(header["rows"]), int(header["cols"])
+    offset += HEADER_DTYPE.itemsize
+    layout = data[offset:offset + layout_bytes]
+    mines = np.unpackbits(layout, count=rows * cols).reshape(rows, cols).astype(bool)
+    offset += layout_bytes
+    moves = data[offset:offset + moves_bytes].view(MOVE_DTYPE)
+    return Replay(rows, cols, int(header["nBombs"]), mines, moves,
+                  int(header["outcome"]), float(header["elapsed"]))
+
+
+def iter_replays(path=None):
+    """
+    Yields the replays of an archive in order. The file is memory-mapped and
+    every replay's moves are a view into the map, so only the pages actually
+    touched are read from disk.
+    """
+    path = path or REPLAYS_FILE
+    data = _open_archive(path)
+    offset = 0
+    while data is not None and offset < data.size:
+        _, layout_bytes, moves_bytes = _read_header(data, offset, path)
+        yield read_replay(data, offset, path)
+        offset += HEADER_DTYPE.itemsize + layout_bytes + moves_bytes
+
+
+# -----------------------
+# Headless replay
+# -----------------------
+
+def replay_game(replay, engine=Minesweeper):
+    """
+    Plays the recorded moves on a fresh engine with the recorded mine layout.
+    Returns (outcome, moves_applied); moves after the game ended are not applied.
+    """
+    game = engine(rows=replay.rows, cols=replay.cols, nBombs=replay.nBombs)
+    game.set_mines(replay.mines)
+    game.first_click = True
+
+    # Plain Python lists: much faster to loop over than numpy scalars
+    actions, rs, cs = replay.moves["action"].tolist(), replay.moves["r"].tolist(), replay.moves["c"].tolist()
+    for i, (action, r, c) in enumerate(zip(actions, rs, cs)):
+        if not game.inside(r, c):
+            raise ValueError(f"Move {i} is off the board: ({r}, {c})")
+        if action == REVEAL:
+            if game.reveal(r, c):
+                return LOST, i + 1
+            if game.won():
+                return WON, i + 1
+        elif action == FLAG:
+            game.toggle_flag(r, c)
+        else:
+            raise ValueError(f"Move {i} has an unknown action: {action}")
+    return ABANDONED, len(actions)
+
+
+def verify_replay(replay, claimed_time=None, engine=Minesweeper):
+    """
+    Checks that a replay is a legitimate game: the layout has the right
+    number of mines, the move times never go backwards, the recorded outcome
+    is what the moves produce, and a win's recorded time matches its last move.
+    'claimed_time' (e.g. a highscore entry's time) must match the recorded
+    time to the 2 decimals highscores keep. Returns (ok, reason).
+    """
+    if int(np.count_nonzero(replay.mines)) != replay.nBombs:
+        return False, "mine layout does not have nBombs mines"
+    times = replay.moves["t"]
+    if times.size and (times[0] < 0 or np.any(np.diff(times) < 0)):
+        return False, "move times go backwards"
+    try:
+        outcome, applied = replay_game(replay, engine)
+    except ValueError as error:
+        return False, str(error)
+    if outcome != replay.outcome:
+        return False, f"moves give '{OUTCOME_NAMES[outcome]}', recorded '{OUTCOME_NAMES[replay.outcome]}'"
+    if applied != len(replay.moves):
+        return False, "moves recorded after the end of the game"
+    if outcome == WON:
+        gap = replay.elapsed - float(times[-1])
+        if not -1e-3 <= gap <= MAX_FINISH_GAP: # 't' is float32, allow for its rounding
+            return False, "recorded time does not match the last move"
+        if claimed_time is not None and abs(round(replay.elapsed, 2) - claimed_time) > 0.005:
+            return False, "claimed time does not match the replay"
+    return True, "ok"
+
+
+def _verify_chunk(path, offsets, engine):
+    """(ok, reason, moves) of the replays at 'offsets'; runs in a worker process when workers > 1."""
+    data = _open_archive(path)
+    results = []
+    for offset in offsets:
+        replay = read_replay(data, offset, path)
+        ok, reason = verify_replay(replay, engine=engine)
+        results.append((ok, reason, len(replay.moves)))
+    return results
+
+
+def verify_archive(path=None, engine=Minesweeper, workers=1):
+    """
+    Verifies every replay of an archive. Returns [(index, ok, reason)] and prints a summary.
+    With workers > 1 the replays are split into chunks of consecutive records
+    and verified in a process pool; every worker maps the archive itself.
+    """
+    path = path or REPLAYS_FILE
+    started = time.perf_counter()
+    offsets = record_offsets(path)
+    chunk = max(1, -(-len(offsets) // (4 * workers))) # a few chunks per worker, for balance
+    chunks = [offsets[i:i + chunk] for i in range(0, len(offsets), chunk)]
+    parts = run_batches(_verify_chunk, [(path, offsets, engine) for offsets in chunks], workers)
+    elapsed = time.perf_counter() - started
+
+    checked = [result for part in parts for result in part]
+    results = [(i, ok, reason) for i, (ok, reason, _) in enumerate(checked)]
+    moves = sum(num_moves for _, _, num_moves in checked)
+    bad = [(i, reason) for i, ok, reason in results if not ok]
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+    print(f"Verified {len(results)} replays ({moves} moves) in {elapsed:.2f}s, {rate:,.0f} games/sec: {len(bad)} invalid")
+    for i, reason in bad[:MAX_REPORTED]:
+        print(f"  replay {i}: {reason}")
+    if len(bad) > MAX_REPORTED:
+        print(f"  ... and {len(bad) - MAX_REPORTED} more")
+    return results
+
+
+def verify_highscore(rows, cols, nBombs, entry, path=None, engine=Minesweeper):
+    """
+    Checks one highscore entry against the replay it was saved with: the
+    record at entry["replay"] must be a valid win on the same configuration
+    whose time is the claimed one. Returns (ok, reason).
+    """
+    if entry.get("replay") is None:
+        return False, "no replay recorded"
+    path = path or REPLAYS_FILE
+    data = _open_archive(path)
+    if data is None:
+        return False, f"{path} is missing"
+    try:
+        replay = read_replay(data, int(entry["replay"]), path)
+    except ValueError as error:
+        return False, str(error)
+    if (replay.rows, replay.cols, replay.nBombs) != (rows, cols, nBombs):
+        return False, f"replay is a {config_key(replay.rows, replay.cols, replay.nBombs)} game"
+    if replay.outcome != WON:
+        return False, f"replay is '{OUTCOME_NAMES[replay.outcome]}', not a win"
+    return verify_replay(replay, claimed_time=entry["time"], engine=engine)
+
+
+def verify_highscores(path=None, engine=Minesweeper):
+    """
+    Verifies every highscore that has a replay offset against the archive.
+    Returns [(config key, entry, ok, reason)] and prints the invalid ones;
+    entries saved without a replay are only counted.
+    """
+    results = []
+    unlinked = 0
+    for key, scores in load_highscores().items():
+        rows, cols, nBombs = (int(part) for part in key.split("x"))
+        for entry in scores:
+            if entry.get("replay") is None:
+                unlinked += 1
+                continue
+            ok, reason = verify_highscore(rows, cols, nBombs, entry, path, engine)
+            results.append((key, entry, ok, reason))
+    bad = [(key, entry, reason) for key, entry, ok, reason in results if not ok]
+    print(f"Verified {len(results)} highscores against their replays: {len(bad)} invalid, "
+          f"{unlinked} without a replay")
+    for key, entry, reason in bad[:MAX_REPORTED]:
+        print(f"  {key} {entry['name']} {entry['time']:.2f}s: {reason}")
+    if len(bad) > MAX_REPORTED:
+        print(f"  ... and {len(bad) - MAX_REPORTED} more")
+    return results
+
+
+def move_timing_stats(path=None):
+    """
+    Move timing statistics over an archive: the think time before each move
+    (time since the previous move of the same game) per action, and game
+    lengths per outcome. Returns a dict.
+    """
+    path = path or REPLAYS_FILE
+    think = {REVEAL: [], FLAG: []}
+    outcomes = {name: [] for name in OUTCOME_NAMES.values()}
+    for replay in iter_replays(path):
+        moves = replay.moves
+        outcomes[OUTCOME_NAMES[replay.outcome]].append(replay.elapsed)
+        if len(moves) < 2:
+            continue # The first move starts the clock, so it has no think time
+        gaps = np.diff(moves["t"].astype(np.float64))
+        actions = moves["action"][1:]
+        for action in think:
+            think[action].append(gaps[actions == action])
+
+    stats = {}
+    for action, name in ((REVEAL, "reveal"), (FLAG, "flag")):
+        gaps = np.concatenate(think[action]) if think[action] else np.zeros(0)
+        stats[f"{name}_moves"] = int(gaps.size)
+        if gaps.size:
+            p50, p90, p99 = np.percentile(gaps, (50, 90, 99))
+            stats[f"{name}_think_mean"] = float(gaps.mean())
+            stats[f"{name}_think_p50"] = float(p50)
+            stats[f"{name}_think_p90"] = float(p90)
+            stats[f"{name}_think_p99"] = float(p99)
+    for name, times in outcomes.items():
+        stats[f"games_{name}"] = len(times)
+        if times:
+            stats[f"mean_time_{name}"] = float(np.mean(times))
+    return stats
+
+
+if __name__ == "__main__":
+    # python replay.py [verify|stats|scores] [archive] [workers]
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    archive = sys.argv[2] if len(sys.argv) > 2 else REPLAYS_FILE
+    if command == "scores":
+        verify_highscores(archive)
+    elif command == "stats":
+        for key, value in move_timing_stats(archive).items():
+            print(f"{key}: {value}")
+    else:
+        verify_archive(archive, workers=int(sys.argv[3]) if len(sys.argv) > 3 else 1)
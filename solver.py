@@ -0,0 +1,196 @@
+# solver.py
+
+# This module contains a deterministic Minesweeper solver that plays games through
+# the public engine methods, plus a benchmark of its speed and win rate per preset.
+
+
+import time
+from minesweeper_game import PRESETS, Minesweeper
+from instrumentation import instrument_game
+from probability import mine_probabilities
+
+
+class Solver:
+    """
+    Plays one game on a Minesweeper (or CompactMinesweeper) instance.
+    Moves come from, in order of preference:
+      1. single-cell rules: a number whose mines are all flagged clears its other
+         neighbors; a number with exactly as many hidden neighbors as missing mines
+         flags them all
+      2. subset propagation: if the hidden cells of constraint A are a subset of
+         those of constraint B, the cells in B - A hold exactly the difference in mines
+      3. a guess on the cell with the lowest exact mine probability (see probability.py)
+    Ties are broken by cell order, so a game is fully determined by its mine layout.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.flags = set() # Cells the solver has proven to be mines
+        self.numbers = {} # Revealed cells with hidden neighbors left: (r, c) -> value
+        self.hidden = {(r, c) for r in range(game.rows) for c in range(game.cols)}
+        self.moves = 0
+        self.guesses = 0
+
+    # --- Bookkeeping ---
+
+    def _open(self, cell):
+        """Reveals a cell; returns True if it was a mine."""
+        self.moves += 1
+        hit_mine = self.game.reveal(*cell)
+        for i in self.game.take_changes():
+            opened = divmod(int(i), self.game.cols)
+            if opened in self.hidden:
+                self.hidden.discard(opened)
+                value = int(self.game.values[opened[0]][opened[1]])
+                if value > 0:
+                    self.numbers[opened] = value
+        return hit_mine
+
+    def _flag(self, cell):
+        self.moves += 1
+        self.flags.add(cell)
+        self.hidden.discard(cell)
+        self.game.toggle_flag(*cell)
+        self.game.take_changes()
+
+    def constraints(self):
+        """
+        (hidden_cells, mines_left) for every number next to hidden cells.
+        Numbers whose neighbors are all settled are dropped on the way.
+        """
+        found = []
+        for cell, value in list(self.numbers.items()):
+            unknown = []
+            flagged = 0
+            for neighbor in self.game.neighbors(*cell):
+                if neighbor in self.flags:
+                    flagged += 1
+                elif neighbor in self.hidden:
+                    unknown.append(neighbor)
+            if unknown:
+                found.append((frozenset(unknown), value - flagged))
+            else:
+                del self.numbers[cell]
+        return found
+
+    # --- Deduction ---
+
+    def deduce(self):
+        """Returns (safe_cells, mine_cells) that follow from the current constraints."""
+        constraints = self.constraints()
+        safe, mines = set(), set()
+
+        # 1. Single-cell rules
+        for unknown, mines_left in constraints:
+            if mines_left == 0:
+                safe |= unknown
+            elif mines_left == len(unknown):
+                mines |= unknown
+        if safe or mines:
+            return safe, mines
+
+        # 2. Subset propagation, only between constraints that share a cell
+        by_cell = {}
+        for constraint in constraints:
+            for cell in constraint[0]:
+                by_cell.setdefault(cell, []).append(constraint)
+        unique = set(constraints)
+        for small, small_left in unique:
+            others = {c for cell in small for c in by_cell[cell]}
+            for big, big_left in others:
+                if len(big) <= len(small) or not small < big:
+                    continue
+                rest = big - small
+                rest_left = big_left - small_left
+                if rest_left == 0:
+                    safe |= rest
+                elif rest_left == len(rest):
+                    mines |= rest
+        return safe, mines
+
+    def guess(self):
+        """Hidden cell with the lowest mine probability, given the proven mines."""
+        risk = mine_probabilities(self.game, known_mines=self.flags)
+        return min(sorted(self.hidden), key=lambda cell: risk[cell])
+
+    # --- Game loop ---
+
+    def play(self, first_click=None):
+        """
+        Plays the game to the end and returns True on a win.
+        The first click (default: the board center) uses the safe-first-click rule.
+        """
+        game = self.game
+        if first_click is None:
+            first_click = (game.rows // 2, game.cols // 2)
+        if not game.first_click:
+            game.place_mines(safe=first_click)
+            game.first_click = True
+        if self._open(first_click):
+            return False
+
+        while not game.won():
+            safe, mines = self.deduce()
+            for cell in sorted(mines):
+                self._flag(cell)
+            if not safe and not mines:
+                self.guesses += 1
+                safe = {self.guess()}
+            for cell in sorted(safe):
+                if cell in self.hidden and self._open(cell):
+                    return False
+        return True
+
+
+def solve_game(rows, cols, nBombs, seed=None, engine=Minesweeper, timer=None):
+    """
+    Plays one solver game on a fresh board. Returns (won, solver).
+    With a StageTimer, the game's engine calls are timed into it.
+    """
+    game = engine(rows=rows, cols=cols, nBombs=nBombs, seed=seed)
+    if timer is not None and timer.enabled:
+        instrument_game(game, timer)
+    solver = Solver(game)
+    return solver.play(), solver
+
+
+def win_rate(rows, cols, nBombs, games, seed=None, timer=None):
+    """Fraction of 'games' the solver wins on a configuration (game i uses seed + i)."""
+    wins = 0
+    for i in range(games):
+        won, _ = solve_game(rows, cols, nBombs, seed=None if seed is None else seed + i, timer=timer)
+        wins += won
+    return wins / games
+
+
+def benchmark(presets=PRESETS, games=200, seed=0):
+    """
+    Plays 'games' solver games per preset (seeds seed, seed+1, ...) and reports
+    throughput and win rate. Returns {preset: {"games_per_sec", "win_rate", ...}}.
+    """
+    results = {}
+    for name, (rows, cols, nBombs) in presets.items():
+        wins = moves = guesses = 0
+        started = time.perf_counter()
+        for game_seed in range(seed, seed + games):
+            won, solver = solve_game(rows, cols, nBombs, seed=game_seed)
+            wins += won
+            moves += solver.moves
+            guesses += solver.guesses
+        elapsed = time.perf_counter() - started
+
+        results[name] = {
+            "config": f"{rows}x{cols}x{nBombs}",
+            "games": games,
+            "games_per_sec": games / elapsed,
+            "win_rate": wins / games,
+            "moves_per_game": moves / games,
+            "guesses_per_game": guesses / games,
+        }
+        print(f"{name:7s} {rows}x{cols}x{nBombs}: {games / elapsed:8.1f} games/sec, "
+              f"win rate {100 * wins / games:5.1f}%, {guesses / games:.2f} guesses/game")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,167 @@
+# sweep.py
+
+# This module runs the analytics over a whole grid of configurations
+# (board sizes x mine counts) in one run, e.g. to study the effect of mine density.
+
+
+import csv
+import time
+import numpy as np
+from analytics import (BATCH_SIZE, analyse_mines, batch_seeds, empty_accumulators, merge_accumulators,
+                       run_batches, sub_chunks)
+from instrumentation import StageTimer
+from minesweeper_game import mine_ranks
+from plots import output_path, plot_vs_density
+
+
+def parse_values(text):
+    """
+    Parses '16', '9,16,30' or an inclusive range 'start-stop' / 'start-stop:step'
+    into a list of ints.
+    """
+    values = []
+    for part in text.replace(" ", "").split(","):
+        if "-" in part:
+            bounds, _, step = part.partition(":")
+            start, stop = bounds.split("-")
+            values.extend(range(int(start), int(stop) + 1, int(step or 1)))
+        elif part:
+            values.append(int(part))
+    return values
+
+
+def sweep_batch(rows, cols, mine_counts, num_boards, seed_seq, profile=False):
+    """
+    Generates one batch of boards of one size and analyses it for every mine count.
+    All mine counts share the batch's random keys, so the sampling is done once
+    per board size, and each config matches analytics_mode for the same seed.
+    Returns (parts, generation): the accumulators of every mine count, and a
+    StageTimer holding the shared "generation" stage of the batch. With
+    'profile' every config's accumulators also carry a StageTimer of its own
+    stages under "timings".
+    """
+    generation = StageTimer(enabled=profile)
+    timers = [StageTimer(enabled=profile) for _ in mine_counts]
+    parts = [empty_accumulators(rows, cols, nBombs) for nBombs in mine_counts]
+    rng = np.random.default_rng(seed_seq)
+    # Large boards go in sub-chunks drawn in order from the batch's stream, as in analyse_batch
+    for start, stop in sub_chunks(rows, cols, num_boards):
+        with generation.stage("generation", items=stop - start):
+            ranks = mine_ranks(rows, cols, stop - start, rng=rng)
+        for nBombs, part, timer in zip(mine_counts, parts, timers):
+            merge_accumulators(part, analyse_mines(rows, cols, nBombs, ranks < nBombs, timer))
+    if profile:
+        for part, timer in zip(parts, timers):
+            part["timings"] = timer
+    return parts, generation
+
+
+def summarize(rows, cols, nBombs, acc):
+    """One summary row (dict) for a configuration's accumulators."""
+    num_boards = acc["num_boards"]
+    sizes = acc["cluster_sizes"]
+    row = {
+        "rows": rows,
+        "cols": cols,
+        "mines": nBombs,
+        "density": nBombs / (rows * cols),
+        "boards": num_boards,
+        "empty_mean": acc["empty_stats"].mean,
+        "empty_std": acc["empty_stats"].std,
+        "empty_fraction": acc["empty_stats"].mean / (rows * cols),
+        "clusters_mean": acc["cluster_stats"].mean,
+        "clusters_std": acc["cluster_stats"].std,
+        "cluster_size_mean": (sizes * np.arange(len(sizes))).sum() / max(sizes.sum(), 1),
+        "bbbv_mean": acc["bbbv_stats"].mean,
+        "bbbv_std": acc["bbbv_stats"].std,
+    }
+    for value, count in enumerate(acc["number_counts"]):
+        row[f"avg_{value}"] = count / num_boards
+    return row
+
+
+def sweep_mode(rows_values, cols_values, mine_values, num_boards=1000, seed=None, workers=1, plots=True,
+               profile=False, output_dir=None):
+    """
+    Runs the analytics for every (rows, cols, mines) combination that fits on the board.
+    All configs go through one shared pool of batches; configs sharing a board
+    size reuse the same generated boards.
+    Writes 'sweep_summary.csv' plus comparison plots (unless 'plots' is False),
+    and returns the summary rows. With 'profile' every row (and the CSV) also
+    gets the seconds spent in each stage for that config, as 'time_<stage>'
+    columns, and the overall breakdown is printed; board generation is
+    shared by the configs of a board size, so it only appears in the breakdown. Files go to 'output_dir'
+    (the current directory by default).
+    """
+    # Mine counts that fit on each board size
+    plan = {}
+    for rows in rows_values:
+        for cols in cols_values:
+            counts = [m for m in mine_values if 0 < m < rows * cols]
+            if counts:
+                plan[(rows, cols)] = counts
+    if not plan:
+        print("No configuration in the sweep fits on its board.")
+        return []
+    num_configs = sum(len(counts) for counts in plan.values())
+    print(f"\nRunning sweep: {num_configs} configs on {len(plan)} board sizes, {num_boards} boards each...")
+
+    accs = {(rows, cols, m): empty_accumulators(rows, cols, m) for (rows, cols), counts in plan.items() for m in counts}
+
+    # Same batch seeds for every board size, as analytics_mode would use them
+    seeds = batch_seeds(seed, -(-num_boards // BATCH_SIZE)) # ceil division
+    jobs = []
+    for (rows, cols), counts in plan.items():
+        for batch, seed_seq in enumerate(seeds):
+            size = min(BATCH_SIZE, num_boards - batch * BATCH_SIZE)
+            jobs.append((rows, cols, counts, size, seed_seq, profile))
+
+    timers = {key: StageTimer() for key in accs} if profile else {}
+    total = StageTimer(enabled=profile)
+
+    def merge(job, result):
+        rows, cols, counts, size, _, _ = job
+        parts, generation = result
+        total.merge(generation)
+        for nBombs, part in zip(counts, parts):
+            if profile:
+                timers[(rows, cols, nBombs)].merge(part.pop("timings"))
+            merge_accumulators(accs[(rows, cols, nBombs)], part)
+        return size
+
+    started = time.perf_counter()
+    run_batches(sweep_batch, jobs, workers, merge, total=num_boards * len(plan))
+
+    wall_time = time.perf_counter() - started
+    summary = [summarize(rows, cols, nBombs, acc) for (rows, cols, nBombs), acc in accs.items()]
+    if profile:
+        for row, timer in zip(summary, timers.values()):
+            total.merge(timer)
+            for stage, seconds in timer.seconds.items():
+                row[f"time_{stage}"] = seconds
+        total.print_summary(wall_time)
+
+    # --- Summary file ---
+    summary_fname = output_path("sweep_summary.csv", output_dir)
+    with open(summary_fname, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(summary[0]))
+        writer.writeheader()
+        writer.writerows(summary)
+
+    fnames = [summary_fname]
+
+    # --- Comparative plots ---
+    if plots:
+        fnames.append(plot_vs_density(summary, "clusters_mean", "Average Mine Clusters Per Board",
+                                      output_path("sweep_clusters_vs_density.png", output_dir)))
+        fnames.append(plot_vs_density(summary, "empty_fraction", "Average Share of Empty (0) Cells",
+                                      output_path("sweep_empty_vs_density.png", output_dir)))
+        fnames.append(plot_vs_density(summary, "bbbv_mean", "Average 3BV Per Board",
+                                      output_path("sweep_bbbv_vs_density.png", output_dir)))
+
+    print("Sweep complete. Files saved:")
+    for fname in fnames:
+        print(f" - {fname}")
+    print()
+    return summary
+
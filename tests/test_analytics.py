@@ -0,0 +1,113 @@
+# test_analytics.py
+
+# Checks the seeding contract of the analytics pipeline: results do not depend
+# on the number of workers or the cell budget, and every board can be
+# regenerated on its own.
+
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+import analytics
+from analytics import (BATCH_SIZE, RunningStats, analyse_batch, analytics_mode, batch_seeds, board_at, collect,
+                       run_batches, sub_chunks)
+from minesweeper_game import generate_boards
+
+
+def assert_same_accumulators(a, b):
+    assert set(a) == set(b)
+    for key in a:
+        if isinstance(a[key], RunningStats):
+            assert np.array_equal(a[key].as_array(), b[key].as_array()), key
+        else:
+            assert np.array_equal(a[key], b[key]), key
+
+
+def test_collect_is_independent_of_workers():
+    # More than two batches, the last one partial
+    serial = collect(9, 9, 10, 2 * BATCH_SIZE + 1234, seed=11, workers=1)
+    parallel = collect(9, 9, 10, 2 * BATCH_SIZE + 1234, seed=11, workers=3)
+    assert_same_accumulators(serial, parallel)
+
+
+def test_analytics_mode_is_independent_of_workers():
+    results = [analytics_mode(9, 9, 10, BATCH_SIZE + 500, seed=5, workers=workers, cache=False, plots=False)
+               for workers in (1, 2)]
+    serial, parallel = (vars(result) for result in results)
+    for key, value in serial.items():
+        if isinstance(value, RunningStats):
+            assert np.array_equal(value.as_array(), parallel[key].as_array()), key
+        elif isinstance(value, np.ndarray):
+            assert np.array_equal(value, parallel[key]), key
+
+
+def test_board_at_matches_batches():
+    seeds = batch_seeds(3, 2)
+    for batch, seed_seq in enumerate(seeds):
+        mines, values = generate_boards(16, 16, 40, BATCH_SIZE, rng=np.random.default_rng(seed_seq))
+        for offset in (0, 1, 4321, BATCH_SIZE - 1):
+            board_mines, board_values = board_at(16, 16, 40, 3, batch * BATCH_SIZE + offset)
+            assert np.array_equal(board_mines, mines[offset])
+            assert np.array_equal(board_values, values[offset])
+
+
+def test_batch_seeds_do_not_depend_on_run_length():
+    short = batch_seeds(9, 2)
+    long = batch_seeds(9, 5)
+    for a, b in zip(short, long):
+        assert np.array_equal(a.generate_state(4), b.generate_state(4))
+
+
+def test_sub_chunks_cut_the_same_boards_whatever_the_skip():
+    size = analytics.chunk_boards(100, 100)
+    assert list(sub_chunks(100, 100, 2 * size + 5)) == [(0, size), (size, 2 * size), (2 * size, 2 * size + 5)]
+    # Starting 7 boards into the batch, the cuts stay at multiples of 'size' within the batch
+    assert list(sub_chunks(100, 100, 2 * size, skip=7)) == [(0, size - 7), (size - 7, 2 * size - 7),
+                                                            (2 * size - 7, 2 * size)]
+
+
+@pytest.mark.parametrize("policy", ["none", "random"])
+@pytest.mark.parametrize("skip", [0, 123])
+def test_sub_chunked_batch_matches_unchunked(monkeypatch, policy, skip):
+    seed_seq = batch_seeds(2, 1)[0]
+    whole = analyse_batch(16, 16, 40, 3000, seed_seq, skip=skip, policy=policy)
+    monkeypatch.setattr(analytics, "CELL_BUDGET", 256 * 700) # 700 boards per sub-chunk
+    chunked = analyse_batch(16, 16, 40, 3000, seed_seq, skip=skip, policy=policy)
+    for key, value in whole.items():
+        if isinstance(value, RunningStats):
+            # Folded in several parts, so equal up to floating point rounding
+            assert np.allclose(value.as_array(), chunked[key].as_array(), rtol=1e-12), key
+        else:
+            assert np.array_equal(value, chunked[key]), key
+
+
+def test_sub_chunks_draw_the_same_boards():
+    rows, cols, size = 16, 16, 700
+    mines, _ = generate_boards(rows, cols, 40, 3000, rng=np.random.default_rng(batch_seeds(2, 1)[0]))
+    rng = np.random.default_rng(batch_seeds(2, 1)[0])
+    parts = [generate_boards(rows, cols, 40, min(size, 3000 - start), rng=rng)[0] for start in range(0, 3000, size)]
+    assert np.array_equal(np.concatenate(parts), mines)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_run_batches_keeps_job_order(workers):
+    jobs = [(i, 0.01 * (5 - i)) for i in range(6)] # Later jobs finish first in a pool
+    results = run_batches(lambda i, delay: time.sleep(delay) or i, jobs, workers, executor_class=ThreadPoolExecutor)
+    assert results == list(range(6))
+
+
+def test_run_batches_cancels_queued_jobs_on_error():
+    ran = []
+
+    def job(i):
+        ran.append(i)
+        time.sleep(0.02)
+        return i
+
+    def fail(job, result):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        run_batches(job, [(i,) for i in range(50)], 2, fail, executor_class=ThreadPoolExecutor)
+    assert len(ran) < 10
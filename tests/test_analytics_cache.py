@@ -0,0 +1,62 @@
+# test_analytics_cache.py
+
+# Checks that a cached analytics run extended to more boards gives exactly the
+# results of a fresh run, and that entries of other cache versions are ignored.
+
+
+import functools
+import numpy as np
+import pytest
+import analytics_cache
+from analytics import BATCH_SIZE, RunningStats, analytics_mode, collect, merge_accumulators
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Points the analytics cache at a temporary directory."""
+    monkeypatch.setattr(analytics_cache, "load", functools.partial(analytics_cache.load, cache_dir=str(tmp_path)))
+    monkeypatch.setattr(analytics_cache, "save", functools.partial(analytics_cache.save, cache_dir=str(tmp_path)))
+    return tmp_path
+
+
+def assert_same_results(a, b):
+    for key, value in vars(a).items():
+        if isinstance(value, RunningStats):
+            assert np.array_equal(value.as_array(), vars(b)[key].as_array()), key
+        elif isinstance(value, np.ndarray):
+            assert np.array_equal(value, vars(b)[key]), key
+
+
+@pytest.mark.parametrize("policy", ["none", "random"])
+def test_extended_collect_matches_fresh(policy):
+    # The first run stops part-way through a batch, so the extension has to skip into it
+    fresh = collect(9, 9, 10, BATCH_SIZE + 3000, seed=4, policy=policy)
+    extended = collect(9, 9, 10, 1234, seed=4, policy=policy)
+    merge_accumulators(extended, collect(9, 9, 10, BATCH_SIZE + 3000, seed=4, first_board=1234, policy=policy))
+    for key, value in fresh.items():
+        if isinstance(value, RunningStats):
+            # Merged in a different grouping, so equal up to rounding
+            assert value.count == extended[key].count
+            assert np.allclose(value.as_array(), extended[key].as_array())
+        else:
+            assert np.array_equal(value, extended[key]), key
+
+
+def test_cached_run_extends_to_fresh_result(cache_dir):
+    analytics_mode(9, 9, 10, 1234, seed=8, plots=False)
+    assert len(list(cache_dir.glob("*.npz"))) == 1
+    extended = analytics_mode(9, 9, 10, BATCH_SIZE + 3000, seed=8, plots=False)
+    fresh = analytics_mode(9, 9, 10, BATCH_SIZE + 3000, seed=8, plots=False, cache=False)
+    assert extended.num_boards == fresh.num_boards
+    for key in ("empty_hist", "number_counts", "cluster_hist", "cluster_sizes", "neighbourhood_sum",
+                "bbbv_hist", "opening_hist"):
+        assert np.array_equal(getattr(extended, key), getattr(fresh, key)), key
+    assert np.isclose(extended.bbbv_stats.mean, fresh.bbbv_stats.mean)
+
+
+def test_other_cache_versions_are_ignored(cache_dir, monkeypatch):
+    first = analytics_mode(9, 9, 10, 500, seed=2, plots=False)
+    cached = analytics_mode(9, 9, 10, 500, seed=2, plots=False)
+    assert_same_results(first, cached)
+    monkeypatch.setattr(analytics_cache, "CACHE_VERSION", analytics_cache.CACHE_VERSION + 1)
+    assert analytics_cache.load(9, 9, 10, 2, 500) is None
@@ -0,0 +1,87 @@
+# test_board_archive.py
+
+# Checks that an archive exported with a seed and first-click policy holds the
+# boards of the matching analytics run, and that analysing it gives the same results.
+
+
+import numpy as np
+import pytest
+import analytics
+from analytics import BATCH_SIZE, FIRST_CLICK_POLICIES, RunningStats, board_at, collect
+from board_archive import (analytics_from_archive, archive_clicks, export_boards, open_boards, read_header,
+                           unpack_boards)
+
+NUM_BOARDS = BATCH_SIZE + 321
+
+
+@pytest.mark.parametrize("policy", FIRST_CLICK_POLICIES)
+def test_archive_matches_analytics_run(tmp_path, policy):
+    path = str(tmp_path / "boards.msba")
+    info = export_boards(path, 9, 9, 10, NUM_BOARDS, seed=4, policy=policy)
+    assert (info["policy"], info["seed"], info["count"]) == (policy, 4, NUM_BOARDS)
+
+    _, packed = open_boards(path)
+    mines = unpack_boards(packed, 9, 9)
+    for board_id in (0, 17, BATCH_SIZE, NUM_BOARDS - 1):
+        assert np.array_equal(mines[board_id], board_at(9, 9, 10, 4, board_id, policy)[0])
+
+    result = analytics_from_archive(path, plots=False)
+    assert result.policy == policy
+    expected = collect(9, 9, 10, NUM_BOARDS, seed=4, policy=policy)
+    for key, value in expected.items():
+        if isinstance(value, RunningStats):
+            assert np.array_equal(vars(result)[key].as_array(), value.as_array()), key
+        elif isinstance(value, np.ndarray):
+            assert np.array_equal(vars(result)[key], value), key
+
+
+def test_sub_chunked_archive_matches_analytics_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics, "CELL_BUDGET", 81 * 3000) # 3000 boards per sub-chunk
+    path = str(tmp_path / "boards.msba")
+    export_boards(path, 9, 9, 10, NUM_BOARDS, seed=6, policy="random")
+    mines = unpack_boards(open_boards(path)[1], 9, 9)
+    for board_id in (0, 2999, 3000, BATCH_SIZE, NUM_BOARDS - 1):
+        assert np.array_equal(mines[board_id], board_at(9, 9, 10, 6, board_id, "random")[0])
+
+    result = analytics_from_archive(path, plots=False)
+    expected = collect(9, 9, 10, NUM_BOARDS, seed=6, policy="random")
+    for key, value in expected.items():
+        if isinstance(value, RunningStats):
+            assert np.array_equal(vars(result)[key].as_array(), value.as_array()), key
+        elif isinstance(value, np.ndarray):
+            assert np.array_equal(vars(result)[key], value), key
+
+
+def test_unseeded_archive_keeps_its_random_clicks(tmp_path):
+    path = str(tmp_path / "boards.msba")
+    info = export_boards(path, 9, 9, 10, 500, policy="random")
+    assert info["seed"] is None
+    clicks = archive_clicks(info, 0, 500)
+    mines = unpack_boards(open_boards(path)[1], 9, 9)
+    # Every board keeps the 3x3 zone around its first click free of mines
+    for board, (r, c) in zip(mines, clicks):
+        assert not board[max(r - 1, 0):r + 2, max(c - 1, 0):c + 2].any()
+    # Clicks starting part-way through the archive are the same clicks
+    assert np.array_equal(archive_clicks(info, 123, 100), clicks[123:223])
+
+
+def test_archive_outputs_go_to_output_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    export_boards("boards.msba", 9, 9, 10, 200, seed=2, policy="center")
+    analytics_from_archive("boards.msba", save_format="npz", output_dir="out")
+    written = sorted(path.name for path in (tmp_path / "out").iterdir())
+    assert "analytics_9x9x10_center.npz" in written
+    assert len([name for name in written if name.endswith(".png")]) == 7
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["boards.msba", "out"]
+
+
+def test_archive_with_unknown_policy_is_rejected(tmp_path):
+    path = str(tmp_path / "boards.msba")
+    export_boards(path, 9, 9, 10, 10, seed=1)
+    with open(path, "r+b") as f:
+        f.seek(7) # The policy byte, after magic, version and has_seed
+        f.write(bytes([len(FIRST_CLICK_POLICIES)]))
+    with pytest.raises(ValueError, match="first-click policy"):
+        read_header(path)
+    with pytest.raises(ValueError, match="first-click policy"):
+        export_boards(path, 9, 9, 10, 10, policy="edge")
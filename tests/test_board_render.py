@@ -0,0 +1,92 @@
+# test_board_render.py
+
+# Checks that the incremental renderer matches game.display(), and that ANSI
+# in-place writes land on the right cells, including boards of 100+ rows.
+
+
+import contextlib
+import io
+import os
+import re
+import pytest
+import board_render
+from board_render import BoardRenderer
+from compact_minesweeper import CompactMinesweeper
+from minesweeper_game import Minesweeper
+
+CURSOR = re.compile(r"\x1b\[(\d+);(\d+)H")
+
+
+def emulate(text):
+    """Replays renderer output on a virtual screen: {(line, column): character}."""
+    screen = {}
+    line = column = 1
+    i = 0
+    while i < len(text):
+        match = CURSOR.match(text, i)
+        if match:
+            line, column = int(match[1]), int(match[2])
+            i = match.end()
+        elif text.startswith(board_render.CLEAR_SCREEN, i):
+            screen.clear()
+            line = column = 1
+            i += len(board_render.CLEAR_SCREEN)
+        elif text.startswith(board_render.CLEAR_BELOW, i):
+            for key in [key for key in screen if key >= (line, column)]:
+                del screen[key]
+            i += len(board_render.CLEAR_BELOW)
+        elif text[i] == "\n":
+            line, column = line + 1, 1
+            i += 1
+        else:
+            screen[(line, column)] = text[i]
+            column += 1
+            i += 1
+    return screen
+
+
+def screen_lines(screen, count):
+    return ["".join(screen.get((line, column), " ") for column in range(1, 400)).rstrip()
+            for line in range(1, count + 1)]
+
+
+@pytest.mark.parametrize("engine", [Minesweeper, CompactMinesweeper])
+@pytest.mark.parametrize("rows", [9, 105])
+def test_frame_matches_display(engine, rows):
+    game = engine(rows=rows, cols=12, nBombs=rows, seed=1)
+    game.place_mines(safe=(5, 5))
+    game.reveal(5, 5)
+    out = io.StringIO()
+    BoardRenderer(game, out=out).draw()
+    shown = io.StringIO()
+    with contextlib.redirect_stdout(shown):
+        game.display()
+    assert out.getvalue() == shown.getvalue()
+
+
+def test_ansi_writes_land_on_the_right_cells(monkeypatch):
+    monkeypatch.setattr(board_render.shutil, "get_terminal_size", lambda: os.terminal_size((400, 200)))
+    game = CompactMinesweeper(rows=120, cols=110, nBombs=1500, seed=3)
+    game.place_mines(safe=(60, 60))
+    out = io.StringIO()
+    renderer = BoardRenderer(game, ansi=True, out=out)
+    assert renderer.ansi
+    renderer.draw()
+    game.reveal(60, 60)
+    game.toggle_flag(0, 0)
+    game.toggle_flag(119, 109)
+    renderer.draw()
+    renderer.draw(reveal_mines=True)
+
+    full = io.StringIO()
+    BoardRenderer(game, out=full).draw(reveal_mines=True)
+    expected = [line.rstrip() for line in full.getvalue().split("\n")][:game.rows + 2]
+    assert screen_lines(emulate(out.getvalue()), game.rows + 2) == expected
+
+
+def test_ansi_falls_back_when_the_board_does_not_fit(monkeypatch):
+    monkeypatch.setattr(board_render.shutil, "get_terminal_size", lambda: os.terminal_size((200, 50)))
+    game = CompactMinesweeper(rows=100, cols=100, nBombs=1000, seed=0)
+    assert not BoardRenderer(game, ansi=True, out=io.StringIO()).ansi
+    small = Minesweeper(rows=9, cols=9, nBombs=10)
+    assert BoardRenderer(small, ansi=True, out=io.StringIO()).ansi
@@ -0,0 +1,84 @@
+# test_clusters.py
+
+# Checks the union-find labeling in clusters.py against a plain BFS
+# (8-connectivity) on random and edge-case boards.
+
+
+from collections import deque
+import numpy as np
+import pytest
+from clusters import cluster_stats_batch, count_clusters, label_components
+
+
+def bfs_clusters(mask):
+    """Sizes of the 8-connected clusters of True cells, by breadth-first search."""
+    rows, cols = mask.shape
+    seen = np.zeros_like(mask, dtype=bool)
+    sizes = []
+    for r in range(rows):
+        for c in range(cols):
+            if not mask[r, c] or seen[r, c]:
+                continue
+            seen[r, c] = True
+            queue = deque([(r, c)])
+            size = 0
+            while queue:
+                cr, cc = queue.popleft()
+                size += 1
+                for dr in (-1, 0, 1):
+                    for dc in (-1, 0, 1):
+                        nr, nc = cr + dr, cc + dc
+                        if 0 <= nr < rows and 0 <= nc < cols and mask[nr, nc] and not seen[nr, nc]:
+                            seen[nr, nc] = True
+                            queue.append((nr, nc))
+            sizes.append(size)
+    return sizes
+
+
+def boards():
+    """Random boards of several shapes and densities, plus the edge cases."""
+    rng = np.random.default_rng(0)
+    shapes = [(1, 1), (1, 17), (17, 1), (2, 2), (9, 9), (16, 16), (30, 16), (5, 40)]
+    cases = []
+    for rows, cols in shapes:
+        cases.append(np.zeros((rows, cols), dtype=bool))
+        cases.append(np.ones((rows, cols), dtype=bool))
+        for density in (0.1, 0.3, 0.5, 0.7):
+            for _ in range(5):
+                cases.append(rng.random((rows, cols)) < density)
+    return cases
+
+
+@pytest.mark.parametrize("mask", boards())
+def test_count_clusters_matches_bfs(mask):
+    assert count_clusters(mask) == len(bfs_clusters(mask))
+
+
+@pytest.mark.parametrize("mask", boards())
+def test_labels_are_component_minimums(mask):
+    labels = label_components(mask)
+    assert (labels[~mask] == -1).all()
+    flat = labels.ravel()
+    roots = np.unique(flat[flat >= 0])
+    # Every root is the smallest flat index of its component, and labels itself
+    for root in roots:
+        assert flat[root] == root
+        assert np.flatnonzero(flat == root).min() == root
+    assert sorted(np.bincount(flat[flat >= 0])[roots]) == sorted(bfs_clusters(mask))
+
+
+@pytest.mark.parametrize("shape", [(1, 12), (12, 1), (9, 9), (16, 16), (30, 16)])
+def test_cluster_stats_batch_matches_bfs(shape):
+    rng = np.random.default_rng(1)
+    mines = rng.random((50, *shape)) < 0.25
+    mines[0] = False # A board without mines
+    mines[1] = True # A board that is all mines
+    counts, size_hist = cluster_stats_batch(mines)
+
+    expected_sizes = []
+    for i, board in enumerate(mines):
+        sizes = bfs_clusters(board)
+        assert counts[i] == len(sizes)
+        expected_sizes += sizes
+    expected_hist = np.bincount(expected_sizes, minlength=size_hist.size)
+    assert np.array_equal(size_hist, expected_hist)
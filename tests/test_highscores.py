@@ -0,0 +1,38 @@
+# test_highscores.py
+
+# Checks that the SQLite highscores backend loses no scores when many
+# processes save at the same time.
+
+
+import multiprocessing
+import os
+import sqlite3
+
+WORKERS = 12
+INSERTS = 30
+
+
+def insert_scores(directory, worker):
+    """Runs in a fresh process: saves INSERTS scores through the public API."""
+    os.chdir(directory) # The default highscore paths are relative
+    from highscores import HIGHSCORES_BACKEND, update_highscores_config
+    assert HIGHSCORES_BACKEND == "sqlite"
+    for i in range(INSERTS):
+        update_highscores_config(9, 9, 10, f"worker{worker}", 10.0 + worker + i / 100, bbbv=i)
+
+
+def test_concurrent_sqlite_inserts_are_all_kept(tmp_path, monkeypatch):
+    monkeypatch.setenv("MINESWEEPER_HIGHSCORES_BACKEND", "sqlite")
+    # Spawned workers import highscores afresh, so they read the environment variable
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=insert_scores, args=(str(tmp_path), worker)) for worker in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+
+    with sqlite3.connect(tmp_path / "minesweeper_highscores.db") as conn:
+        (count,) = conn.execute("SELECT COUNT(*) FROM scores").fetchone()
+        (distinct,) = conn.execute("SELECT COUNT(DISTINCT name || ':' || time) FROM scores").fetchone()
+    assert count == distinct == WORKERS * INSERTS
@@ -0,0 +1,28 @@
+# test_main.py
+
+# Checks that the command line rejects invalid numbers with an argparse error
+# (exit code 2) before anything runs.
+
+
+import pytest
+from main import build_parser
+
+
+@pytest.mark.parametrize("argv", [
+    ["analytics", "--seed", "-1"],
+    ["analytics", "--solver-games", "-5"],
+    ["analytics", "--boards", "0"],
+    ["sweep", "--seed", "-3"],
+    ["play", "--seed", "-1"],
+    ["play", "--seed", "abc"],
+])
+def test_invalid_numbers_are_argparse_errors(argv, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        build_parser().parse_args(argv)
+    assert exit_info.value.code == 2
+    assert f"argument {argv[1]}" in capsys.readouterr().err
+
+
+def test_zero_is_a_valid_seed_and_game_count():
+    args = build_parser().parse_args(["analytics", "--seed", "0", "--solver-games", "0"])
+    assert (args.seed, args.solver_games) == (0, 0)
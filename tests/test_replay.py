@@ -0,0 +1,107 @@
+# test_replay.py
+
+# Checks that a highscore saved with the offset of its replay can be verified
+# against that exact record, with both highscore backends.
+
+
+import sqlite3
+import pytest
+import highscores
+import replay as replay_module
+from highscores import HighscoreStore, SQLiteHighscoreStore
+from minesweeper_game import Minesweeper
+from replay import (LOST, REVEAL, WON, Replay, append_replay, iter_replays, move_timing_stats, record_offsets,
+                    verify_archive, verify_highscore)
+
+ROWS, COLS, MINES = 9, 9, 10
+
+
+def won_replay(seed):
+    """Replay of a game won by revealing the safe cells in order, one move per second."""
+    game = Minesweeper(rows=ROWS, cols=COLS, nBombs=MINES, seed=seed)
+    game.place_mines(safe=(ROWS // 2, COLS // 2))
+    game.first_click = True
+    moves = []
+    for r in range(ROWS):
+        for c in range(COLS):
+            if (r, c) not in game.mines and (r, c) not in game.revealed and not game.won():
+                moves.append((REVEAL, r, c, float(len(moves))))
+                game.reveal(r, c)
+    assert game.won()
+    return Replay.from_game(game, moves, WON, moves[-1][3])
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path, monkeypatch):
+    """A highscore store of each backend in a temporary directory, used by update_highscores_config."""
+    if request.param == "json":
+        store = HighscoreStore(str(tmp_path / "scores.json"))
+    else:
+        store = SQLiteHighscoreStore(str(tmp_path / "scores.db"), json_path=None)
+    monkeypatch.setattr(highscores, "get_store", lambda path=None, backend=None: store)
+    yield store
+    if request.param == "sqlite":
+        store.close()
+
+
+def test_append_replay_returns_record_offsets(tmp_path):
+    path = str(tmp_path / "replays.bin")
+    first, second = won_replay(1), won_replay(2)
+    assert append_replay(first, path) == 0
+    assert append_replay(second, path) == len(first.to_bytes())
+
+
+def test_readers_follow_the_configured_archive(tmp_path, monkeypatch):
+    # As main does for --replays: reassigned after the module was imported
+    monkeypatch.setattr(replay_module, "REPLAYS_FILE", str(tmp_path / "configured.bin"))
+    first = append_replay(won_replay(1))
+    second = append_replay(won_replay(2))
+    assert record_offsets() == [first, second]
+    assert len(list(iter_replays())) == 2
+    assert [ok for _, ok, _ in verify_archive()] == [True, True]
+    assert move_timing_stats()["games_won"] == 2
+
+
+def test_highscore_is_verified_against_its_replay(tmp_path, store):
+    path = str(tmp_path / "replays.bin")
+    append_replay(won_replay(1), path) # Another game before it
+    replay = won_replay(2)
+    offset = append_replay(replay, path)
+    highscores.update_highscores_config(ROWS, COLS, MINES, "Alice", replay.elapsed, replay=offset)
+
+    (entry,) = store.scores(ROWS, COLS, MINES)
+    assert entry["replay"] == offset
+    assert verify_highscore(ROWS, COLS, MINES, entry, path) == (True, "ok")
+
+    # A faster claimed time, the wrong record or configuration, or no replay all fail
+    assert not verify_highscore(ROWS, COLS, MINES, dict(entry, time=entry["time"] - 1), path)[0]
+    assert not verify_highscore(ROWS, COLS, MINES, dict(entry, replay=offset + 1), path)[0]
+    assert not verify_highscore(ROWS, COLS, MINES + 1, entry, path)[0]
+    assert not verify_highscore(ROWS, COLS, MINES, {"name": "Bob", "time": 1.0}, path)[0]
+
+
+def test_lost_replay_does_not_verify_a_score(tmp_path):
+    path = str(tmp_path / "replays.bin")
+    replay = won_replay(3)
+    replay.outcome = LOST # Recorded as lost although the moves win: fails either way
+    offset = append_replay(replay, path)
+    ok, _ = verify_highscore(ROWS, COLS, MINES, {"name": "Eve", "time": round(replay.elapsed, 2),
+                                                 "replay": offset}, path)
+    assert not ok
+
+
+def test_sqlite_database_without_replay_column_is_upgraded(tmp_path):
+    path = tmp_path / "old.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE scores (id INTEGER PRIMARY KEY, config_key TEXT NOT NULL, "
+                     "name TEXT NOT NULL, time REAL NOT NULL, bbbv INTEGER)")
+        conn.execute("INSERT INTO scores (config_key, name, time, bbbv) VALUES ('9x9x10', 'Old', 12.5, 20)")
+    conn.close()
+
+    store = SQLiteHighscoreStore(str(path), json_path=None)
+    try:
+        store.add(ROWS, COLS, MINES, "New", 10.0, bbbv=18, replay=64)
+        assert store.scores(ROWS, COLS, MINES) == [{"name": "New", "time": 10.0, "3bv": 18, "replay": 64},
+                                                  {"name": "Old", "time": 12.5, "3bv": 20}]
+    finally:
+        store.close()
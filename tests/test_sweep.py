@@ -0,0 +1,24 @@
+# test_sweep.py
+
+# Checks that the board generation shared by the mine counts of a sweep batch
+# is timed once, with the real number of boards.
+
+
+import numpy as np
+from sweep import sweep_batch
+
+
+def test_shared_generation_is_timed_once():
+    parts, generation = sweep_batch(9, 9, [10, 20, 30], 500, np.random.SeedSequence(1), profile=True)
+    assert generation.items == {"generation": 500}
+    assert generation.calls == {"generation": 1}
+    for part in parts:
+        timings = part["timings"]
+        assert "generation" not in timings.seconds
+        assert all(items == 500 for items in timings.items.values())
+
+
+def test_generation_is_not_timed_without_profile():
+    parts, generation = sweep_batch(9, 9, [10, 20], 100, np.random.SeedSequence(1))
+    assert generation.seconds == {}
+    assert all("timings" not in part for part in parts)